@@ -0,0 +1,263 @@
+"""
+    Benchmarks of the genetic programming hot paths,
+
+    Run from the repository root:
+        python -m benchmarks.bench_gp --output results.json
+        python -m benchmarks.bench_gp --baseline results.json   (exits with 1 on a regression)
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import platform
+import tracemalloc
+import numpy as np
+from typing import Callable, List, Tuple
+from genetic_algorithm.algorithm import Algorithm
+from genetic_algorithm.population import Population
+from genetic_algorithm.ga_operations import cross_over, mutate, select_many, replace_worst
+
+FUNCTIONS = {1: ['sin', 'cos', 'abs', 'sqrt', 'tg', 'ctg', 'e', 'ln', 'tanh'],
+             2: ['+', '*', '^', '-', '/']}
+TERMINALS = ['x0']
+
+
+def measure(operation: Callable[[], int], min_time: float) -> Tuple[float, int]:
+    """
+        Function to time an operation, repeating it for at least min_time seconds,
+
+        Parameters:
+            operation (callable): Operation to be timed, returns the amount of work it did (nodes, evaluations...)
+            min_time (float): Minimum time spent repeating the operation
+
+        Returns:
+            Work done per second and peak memory (bytes) allocated by one run of the operation
+    """
+
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    work = 0
+    start = time.perf_counter()
+
+    while True:
+        work += operation()
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= min_time:
+            return work / elapsed, peak
+
+
+def seeded_population(size: int, depth: int, seed: int) -> Population:
+    """
+        Function to create the same population for the same arguments,
+    """
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+    return Population(size, 20, FUNCTIONS, TERMINALS, depth, 20)
+
+
+def dataset(points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Function to create a dataset of the given size on the usual range,
+    """
+
+    x = np.linspace(-10, 10, points).reshape(-1, 1)
+
+    return x, np.tanh(x) + 1
+
+
+def benchmarks(sizes: List[int], depths: List[int], points: List[int], seed: int, min_time: float) -> list:
+    """
+        Function to run every benchmark,
+
+        Returns:
+            One result per benchmark and parameters
+    """
+
+    results = []
+
+    def record(name: str, unit: str, params: dict, operation: Callable[[], int]) -> None:
+        value, peak = measure(operation, min_time)
+        results.append({"name": name, "params": params, "unit": unit, "value": value, "peak_bytes": peak})
+        print(f"{name:<16} {json.dumps(params):<48} {value:>14.1f} {unit:<14} {peak / 2 ** 20:>8.2f} MiB")
+
+    for depth in depths:
+        population = seeded_population(max(sizes), depth, seed)
+        members = population.list
+
+        for count in points:
+            x, y = dataset(count)
+            sample = members[:max(1, min(len(members), 2_000_000 // count))]
+            nodes = sum(len(chromosome.gen) for chromosome in sample)
+
+            def running() -> int:
+                for chromosome in sample:
+                    chromosome.run(x)
+
+                return nodes * count
+
+            def evaluating() -> int:
+                for chromosome in sample:
+                    chromosome.calculate_fitness(x, y)
+
+                return len(sample)
+
+            record("run", "nodes/s", {"depth": depth, "points": count}, running)
+            record("fitness", "evaluations/s", {"depth": depth, "points": count}, evaluating)
+
+        x, y = dataset(min(points))
+
+        for chromosome in members:
+            chromosome.calculate_fitness(x, y)
+
+        population.reindex()
+
+        # parents are drawn like in training, so there are pairs whatever the population size
+        parents = [select_many(population, population.num_selected, 2) for _ in range(200)]
+
+        def crossing() -> int:
+            for mother, father in parents:
+                cross_over(mother, father, population.max_depth)
+
+            return len(parents)
+
+        # mutate works in place, so it gets copies of the members
+        copies = [cross_over(chromosome, chromosome, population.max_depth) for chromosome in members[:200]]
+
+        def mutating() -> int:
+            for chromosome in copies:
+                mutate(chromosome)
+
+            return len(copies)
+
+        # replace_worst keeps the chromosomes it is given, so every pass puts in children that are not members
+        # (the first ones are copies, then the members the previous pass took out), each one better than any
+        # member, so every call replaces the worst member
+        children = [cross_over(chromosome, chromosome, population.max_depth) for chromosome in members[:200]]
+        better = itertools.count(-1, -1)
+
+        def replacing() -> int:
+            replaced = []
+
+            for chromosome in children:
+                replaced.append(population.list[population.worst_position()])
+                chromosome.fitness = next(better)
+                replace_worst(population, chromosome)
+
+            children[:] = replaced
+
+            return len(replaced)
+
+        record("cross_over", "ops/s", {"depth": depth}, crossing)
+        record("mutate", "ops/s", {"depth": depth}, mutating)
+        record("selection", "ops/s", {"depth": depth, "size": len(members)},
+               lambda: len(select_many(population, population.num_selected, 1000)))
+        record("replace_worst", "ops/s", {"depth": depth, "size": len(members)}, replacing)
+
+    for size in sizes:
+        for count in points:
+            x, y = dataset(count)
+            steps = 500
+
+            # no iteration cap, every timed call breeds more steps of the same run
+            algorithm = Algorithm(seeded_population(size, min(depths), seed), sys.maxsize, x, y, steps,
+                                  progress=False)
+
+            def initializing() -> int:
+                algorithm.initialize()
+                return size
+
+            def training() -> int:
+                algorithm.evolve(steps)
+                return steps
+
+            # training goes on from the last initialization, so it only times breeding
+            record("initialize", "members/s", {"size": size, "points": count}, initializing)
+            record("train", "steps/s", {"size": size, "points": count}, training)
+
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float) -> bool:
+    """
+        Function to compare results with a baseline, printing the changes,
+
+        Parameters:
+            results (list): Results of this run
+            baseline (list): Results of the baseline run
+            tolerance (float): Relative slowdown allowed before it is a regression
+
+        Returns:
+            Whether no benchmark regressed
+    """
+
+    old = {(result["name"], json.dumps(result["params"], sort_keys=True)): result for result in baseline}
+    passed = True
+
+    print("\n< Compared to baseline >\n")
+
+    for result in results:
+        reference = old.get((result["name"], json.dumps(result["params"], sort_keys=True)))
+
+        if reference is None:
+            continue
+
+        ratio = result["value"] / reference["value"]
+        regressed = ratio < 1 - tolerance
+        passed = passed and not regressed
+
+        print(f"{result['name']:<16} {json.dumps(result['params']):<48} x{ratio:<8.3f}"
+              f"{'REGRESSION' if regressed else ''}")
+
+    return passed
+
+
+def main(argv: List[str] = None) -> int:
+    """
+        Function to run the benchmarks from the command line,
+
+        Returns:
+            Exit code, 1 if a benchmark regressed compared to the baseline
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmarks of the genetic programming hot paths")
+    parser.add_argument("--sizes", default="1000,8000", help="population sizes, comma separated")
+    parser.add_argument("--depths", default="4,6", help="initial tree depths, comma separated")
+    parser.add_argument("--points", default="666,100000,1000000", help="dataset sizes, comma separated")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent repeating every benchmark")
+    parser.add_argument("--output", help="file the results are saved to (JSON)")
+    parser.add_argument("--baseline", help="results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    def numbers(text: str) -> List[int]:
+        return [int(number) for number in text.split(",")]
+
+    results = benchmarks(numbers(args.sizes), numbers(args.depths), numbers(args.points), args.seed,
+                         args.min_time)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"machine": {"python": platform.python_version(), "numpy": np.__version__,
+                                   "platform": platform.platform(), "processor": platform.processor()},
+                       "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": args.seed, "results": results},
+                      file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            return 0 if compare(results, json.load(file)["results"], args.tolerance) else 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
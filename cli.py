@@ -0,0 +1,315 @@
+"""
+    Command-line entry point for non-interactive runs,
+
+    Examples:
+        python cli.py --target case4_1_f --population 2000 --seed 1 --output runs/case4_1
+        python cli.py --config run.json --dataset points.npy --plot runs/fit.png
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import List
+
+# every setting of a run and its default, a config file and the command line override them in this order
+DEFAULTS = {
+    "population": 8000,
+    "selected": 20,
+    "depth": 6,
+    "max_depth": 20,
+    "iterations": None,
+    "epoch_feedback": 100,
+    "terminals": None,
+    "functions": ["sin", "cos", "abs", "sqrt", "tg", "ctg", "e", "ln", "tanh"],
+    "operators": ["+", "*", "^", "-", "/"],
+    "dataset": None,
+    "inputs": 1,
+    "outputs": 1,
+    "target": "case4_4_f",
+    "x_start": -10.0,
+    "x_end": 10.0,
+    "x_step": 0.03,
+    "seed": None,
+    "init": "random",
+    "mode": "steady",
+    "batch_size": 1,
+    "elitism": 1,
+    "workers": 0,
+    "cache_size": 0,
+    "race_chunk_size": 0,
+    "simplify": False,
+    "parsimony": 0.0,
+    "linear_scaling": False,
+    "dedup": None,
+    "dedup_penalty": 0.1,
+    "target_fitness": None,
+    "stagnation": 0,
+    "time_budget": None,
+    "evaluation_budget": 0,
+    "checkpoint": None,
+    "checkpoint_interval": 10000,
+    "output": ".",
+    "plot": None,
+    "progress": False,
+}
+
+LIST_SETTINGS = ("terminals", "functions", "operators")
+
+# settings of Algorithm that MultiTargetAlgorithm does not have, a run with several targets must leave them as default
+SINGLE_TARGET_SETTINGS = ("mode", "batch_size", "elitism", "workers", "cache_size", "race_chunk_size", "dedup",
+                          "dedup_penalty", "target_fitness", "stagnation", "time_budget", "evaluation_budget",
+                          "checkpoint", "checkpoint_interval")
+
+
+def parse_args(argv: List[str] = None) -> dict:
+    """
+        Function to read the settings of a run from the command line and an optional config file,
+
+        Parameters:
+            argv (list): Command-line arguments, default is sys.argv
+
+        Returns:
+            settings: Every setting of DEFAULTS
+    """
+
+    parser = argparse.ArgumentParser(description="Approximate a function with genetic programming")
+    parser.add_argument("--config", help="JSON file with any of the settings below (dashes become underscores)")
+    parser.add_argument("--population", type=int, help="number of members in the population")
+    parser.add_argument("--selected", type=int, help="number of members in a selection tournament")
+    parser.add_argument("--depth", type=int, help="initial depth of a tree")
+    parser.add_argument("--max-depth", type=int, help="maximum depth of a tree")
+    parser.add_argument("--iterations", type=int, help="number of children bred, default is the population size")
+    parser.add_argument("--epoch-feedback", type=int, help="number of iterations between two recorded bests")
+    parser.add_argument("--terminals", help="terminals, comma separated (x0,x1...), default is one per input column")
+    parser.add_argument("--functions", help="unary functions, comma separated")
+    parser.add_argument("--operators", help="binary operators, comma separated")
+    parser.add_argument("--dataset", help="points file (.txt, .npy or raw float64), instead of a target")
+    parser.add_argument("--inputs", type=int, help="number of input columns of a raw binary dataset")
+    parser.add_argument("--outputs", type=int, help="number of output columns (targets) of a dataset, "
+                                                    "several targets are fitted together (without the "
+                                                    "breeding, evaluation, dedup, stopping and checkpoint "
+                                                    "settings)")
+    parser.add_argument("--target", help="case function of main.Main the points are created from")
+    parser.add_argument("--x-start", type=float, help="start of the range of x for the target")
+    parser.add_argument("--x-end", type=float, help="end of the range of x for the target")
+    parser.add_argument("--x-step", type=float, help="step of the range of x for the target")
+    parser.add_argument("--seed", type=int, help="seed of the random generators")
+    parser.add_argument("--init", choices=("random", "ramped"), help="how the initial population is made")
+    parser.add_argument("--mode", choices=("steady", "generational"), help="breeding mode")
+    parser.add_argument("--batch-size", type=int, help="children bred together in steady mode")
+    parser.add_argument("--elitism", type=int, help="members kept between generations in generational mode")
+    parser.add_argument("--workers", type=int, help="worker processes calculating fitness")
+    parser.add_argument("--cache-size", type=int, help="genotypes kept in the fitness cache")
+    parser.add_argument("--race-chunk-size", type=int, help="points between two early-abort checks")
+    parser.add_argument("--simplify", action="store_true", default=None,
+                        help="simplify children before evaluation and the best function")
+    parser.add_argument("--parsimony", type=float, help="fitness added for every node of a tree")
+    parser.add_argument("--linear-scaling", action="store_true", default=None,
+                        help="fit the best a + b * f(x) of every tree in closed form")
+    parser.add_argument("--dedup", choices=("reject", "penalize"),
+                        help="keep out or penalize trees computing the same outputs as a member")
+    parser.add_argument("--dedup-penalty", type=float, help="fitness added to a semantic duplicate")
+    parser.add_argument("--target-fitness", type=float, help="stop once the best fitness is at most this")
+    parser.add_argument("--stagnation", type=int, help="stop after this many iterations without a better best")
+    parser.add_argument("--time-budget", type=float, help="stop after this many seconds")
+    parser.add_argument("--evaluation-budget", type=int, help="stop after this many fitness evaluations")
+    parser.add_argument("--checkpoint", help="file the training state is saved to, resumed from if it exists "
+                                             "(with the same dataset and population settings)")
+    parser.add_argument("--checkpoint-interval", type=int, help="number of iterations between two checkpoints, "
+                                                                "the last one is always saved when a run stops")
+    parser.add_argument("--output", help="directory the results are written to")
+    parser.add_argument("--plot", help="image file the expected and predicted functions are drawn to")
+    parser.add_argument("--progress", action="store_true", default=None, help="show progress bars")
+    args = vars(parser.parse_args(argv))
+
+    settings = dict(DEFAULTS)
+
+    config_path = args.pop("config")
+
+    if config_path:
+        with open(config_path) as file:
+            config = {key.replace("-", "_"): value for key, value in json.load(file).items()}
+
+        unknown = set(config) - set(DEFAULTS)
+
+        if unknown:
+            parser.error(f"unknown settings in config: {', '.join(sorted(unknown))}")
+
+        settings.update(config)
+
+    for key, value in args.items():
+        if value is not None:
+            settings[key] = value.split(",") if key in LIST_SETTINGS else value
+
+    if settings["iterations"] is None:
+        settings["iterations"] = settings["population"]
+
+    if settings["outputs"] > 1:
+        unsupported = [key for key in SINGLE_TARGET_SETTINGS if settings[key] != DEFAULTS[key]]
+
+        if unsupported:
+            parser.error(f"settings not supported with several outputs: {', '.join(unsupported)}")
+
+    return settings
+
+
+def load_points(settings: dict):
+    """
+        Function to get the points of a run, from a dataset file or created from a target function,
+    """
+
+    if settings["dataset"]:
+        from genetic_algorithm.dataset import load_dataset
+
+        return load_dataset(settings["dataset"], settings["outputs"], settings["inputs"] + settings["outputs"])
+
+    from main import Main
+    from genetic_algorithm.dataset import generate_dataset
+
+    return generate_dataset(getattr(Main, settings["target"]), settings["x_start"], settings["x_end"],
+                            settings["x_step"])
+
+
+def run(settings: dict) -> dict:
+    """
+        Function to train on the points of a run and write the results,
+
+        Parameters:
+            settings (dict): Settings of the run, see DEFAULTS
+
+        Returns:
+            The results written to result.json
+    """
+
+    import numpy as np
+    from genetic_algorithm.algorithm import Algorithm
+    from genetic_algorithm.multi_target import MultiTargetAlgorithm
+    from genetic_algorithm.population import Population
+    from genetic_algorithm.chromosome import make_terminal_set
+    from genetic_algorithm.dataset import write_text_points
+
+    start_time = time.time()
+
+    if settings["seed"] is not None:
+        random.seed(settings["seed"])
+        np.random.seed(settings["seed"])
+
+    X, Y = load_points(settings)
+
+    if settings["terminals"] is None:
+        settings["terminals"] = make_terminal_set(X.shape[1])
+
+    functions = {1: settings["functions"], 2: settings["operators"]}
+
+    options = {"cache_size": settings["cache_size"], "workers": settings["workers"], "mode": settings["mode"],
+               "batch_size": settings["batch_size"], "elitism": settings["elitism"],
+               "race_chunk_size": settings["race_chunk_size"], "progress": settings["progress"],
+               "checkpoint_path": settings["checkpoint"], "checkpoint_interval": settings["checkpoint_interval"],
+               "simplify": settings["simplify"], "parsimony": settings["parsimony"],
+               "linear_scaling": settings["linear_scaling"],
+               "dedup": settings["dedup"], "dedup_penalty": settings["dedup_penalty"],
+               "target_fitness": settings["target_fitness"], "stagnation": settings["stagnation"],
+               "time_budget": settings["time_budget"], "evaluation_budget": settings["evaluation_budget"]}
+
+    if settings["checkpoint"]:
+        os.makedirs(os.path.dirname(os.path.abspath(settings["checkpoint"])), exist_ok=True)
+
+    if Y.shape[1] > 1:
+        # every target gets its own population, fed by the same trees and evaluations
+        population = Population(settings["population"], settings["selected"], functions, settings["terminals"],
+                                settings["depth"], settings["max_depth"], init=settings["init"],
+                                seed=settings["seed"])
+        algorithm = MultiTargetAlgorithm(population, settings["iterations"], X, Y, settings["epoch_feedback"],
+                                         settings["parsimony"], settings["linear_scaling"], settings["simplify"],
+                                         settings["progress"])
+        fitted = algorithm.train()
+
+    elif settings["checkpoint"] and os.path.exists(settings["checkpoint"]):
+        # only the settings of the population are needed to check the checkpoint, not its members
+        expected = Population(settings["population"], settings["selected"], functions, settings["terminals"],
+                              settings["depth"], settings["max_depth"], members=[])
+        algorithm = Algorithm.resume(settings["checkpoint"], X, Y, settings["iterations"], settings["epoch_feedback"],
+                                     expected, **options)
+        fitted = [algorithm.train()]
+
+    else:
+        population = Population(settings["population"], settings["selected"], functions, settings["terminals"],
+                                settings["depth"], settings["max_depth"], init=settings["init"],
+                                seed=settings["seed"], workers=settings["workers"])
+        algorithm = Algorithm(population, settings["iterations"], X, Y, settings["epoch_feedback"], **options)
+        fitted = [algorithm.train()]
+
+    y_pred = np.column_stack([best_function.predict(X) for best_function, _ in fitted])
+
+    os.makedirs(settings["output"], exist_ok=True)
+    write_text_points(os.path.join(settings["output"], "predicted.txt"), X, y_pred)
+
+    targets = [{"best": best_function.gen,
+                "scaling": best_function.scaling,
+                "expression": str(best_function),
+                "fitness": float(best_function.fitness),
+                "found_functions": [[gen, float(fitness)] for gen, fitness in found_functions]}
+               for best_function, found_functions in fitted]
+
+    if len(targets) == 1:
+        results = dict(targets[0])
+        results.update({"diversity": algorithm.population.diversity(),
+                        "stop_reason": algorithm.stop_reason,
+                        "step": algorithm.step})
+
+    else:
+        results = {"targets": targets, "step": algorithm.step}
+
+    results.update({"evaluations": algorithm.evaluations,
+                    "seconds": time.time() - start_time,
+                    "settings": settings})
+
+    with open(os.path.join(settings["output"], "result.json"), "w") as file:
+        json.dump(results, file, indent=2)
+
+    if settings["plot"]:
+        # only runs that draw pay for importing matplotlib, and they never need a display
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        # the first input is on the x axis, one pair of curves per target
+        for target in range(Y.shape[1]):
+            suffix = f" y{target}" if Y.shape[1] > 1 else ""
+            plt.plot(X[:, 0], Y[:, target], linestyle='dashed', label='Expected' + suffix)
+            plt.plot(X[:, 0], y_pred[:, target], linestyle='dashed', label='Predicted' + suffix)
+
+        plt.legend()
+        plt.savefig(settings["plot"])
+        plt.close()
+
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    """
+        Function to run from the command line,
+
+        Returns:
+            Exit code
+    """
+
+    results = run(parse_args(argv))
+
+    if "targets" not in results:
+        print(f"{results['expression']} -- Fitness: {results['fitness']} -- {results['seconds']:.2f} seconds")
+        return 0
+
+    for target, fitted in enumerate(results["targets"]):
+        print(f"y{target} = {fitted['expression']} -- Fitness: {fitted['fitness']}")
+
+    print(f"{results['seconds']:.2f} seconds")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,24 @@
+import math
+import time
+import random
+import asyncio
+import threading
+import contextlib
+import numpy as np
 from tqdm import tqdm
-from typing import List
+from typing import AsyncGenerator, Callable, Generator, List
 from genetic_algorithm.ga_operations import *
+from genetic_algorithm.fitness_cache import FitnessCache
+from genetic_algorithm.parallel import ParallelEvaluator
+from genetic_algorithm.sampling import Sampler
+from genetic_algorithm.checkpoint import CheckpointWriter, load_checkpoint
+from genetic_algorithm.instrumentation import Instrumentation
+from genetic_algorithm.simplify import simplify
 from genetic_algorithm.population import Population
 
+# what __timer gives when instrumentation is off, a null context can be entered any number of times
+NO_TIMER = contextlib.nullcontext()
+
 
 class Algorithm:
     """
@@ -11,12 +27,47 @@ class Algorithm:
         Attributes:
             population (Population): Population for the current algorithm
             iterations (int): Number of iterations for the algorithm
-            inputs (list): Inputs (x list)
-            outputs (list): Outputs (x list)
+            inputs (np.ndarray): Inputs (x list), one row per point
+            outputs (np.ndarray): Outputs (y list), one row per point
             epoch_feedback (int): Number of epochs to show feedback
+            cache (FitnessCache): Cache of already evaluated genotypes, None if disabled
+            workers (int): Number of worker processes calculating fitness, 0 evaluates in this process
+            mode (str): Breeding mode, 'steady' replaces the worst members, 'generational' replaces everyone
+            batch_size (int): Number of children bred and evaluated together in steady mode
+            elitism (int): Number of best members kept from one generation to the next in generational mode
+            race_chunk_size (int): Number of points between two checks against the worst member, 0 disables racing
+            sampler (Sampler): Subset of the points fitness is calculated on, None to use all of them
+            full_elites (int): Number of best members checked on the whole dataset when the best is reported
+            progress (bool): Whether progress bars are shown
+            checkpoint_path (str): Path the training state is saved to, None disables checkpoints
+            checkpoint_interval (int): Number of children bred between two checkpoints
+            instrumentation (Instrumentation): Counters, timers and hooks of the run, None turns them off
+            simplify (bool): Whether children are simplified before evaluation, and the best before it is reported
+            parsimony (float): Fitness added for every node of a genotype, 0 disables the parsimony pressure
+            linear_scaling (bool): Whether fitness is the MSE of the best a + b * gen, see Chromosome.scaled_error
+            dedup (str): What happens to members computing the same outputs as another, None, 'reject' or 'penalize'
+            dedup_penalty (float): Fitness added to a semantic duplicate
+            semantic_decimals (int): Number of decimals outputs are rounded to before they are compared
+            target_fitness (float): Training stops once the best fitness is at most this, None disables it
+            stagnation (int): Training stops once this many children are bred without a better best, 0 disables it
+            time_budget (float): Training stops after this many seconds, None disables it
+            evaluation_budget (int): Training stops after this many fitness evaluations, 0 disables it
+            step (int): Number of children bred so far
+            evaluations (int): Number of fitness evaluations computed so far (cache hits don't count)
+            stop_reason (str): Why training stopped: 'iterations', 'target_fitness', 'stagnation', 'time_budget' or
+                               'evaluation_budget', None while it goes on
+            best_keeper (list): Genotype and fitness of the best member at every feedback epoch
     """
 
-    def __init__(self, population: Population, iterations: int, inputs: list, outputs: list, epoch_feedback: int = 100):
+    def __init__(self, population: Population, iterations: int, inputs: list, outputs: list, epoch_feedback: int = 100,
+                 cache_size: int = 0, workers: int = 0, mode: str = 'steady', batch_size: int = 1,
+                 elitism: int = 1, race_chunk_size: int = 0, sampler: Union[Sampler, None] = None,
+                 full_elites: int = 10, progress: bool = True, checkpoint_path: Union[str, None] = None,
+                 checkpoint_interval: int = 10000, instrumentation: Union[Instrumentation, None] = None,
+                 simplify: bool = False, parsimony: float = 0.0, linear_scaling: bool = False,
+                 dedup: Union[str, None] = None, dedup_penalty: float = 0.1, semantic_decimals: int = 6,
+                 target_fitness: Union[float, None] = None, stagnation: int = 0,
+                 time_budget: Union[float, None] = None, evaluation_budget: int = 0):
         """
             Constructor for Algorithm class,
 
@@ -26,70 +77,964 @@ class Algorithm:
                 inputs (list): Inputs (x list)
                 outputs (list): Outputs (x list)
                 epoch_feedback (int): Number of epochs to show feedback
+                cache_size (int): Number of genotypes kept in the fitness cache, 0 disables the cache
+                workers (int): Number of worker processes calculating fitness, 0 evaluates in this process
+                mode (str): Breeding mode, 'steady' or 'generational'
+                batch_size (int): Number of children bred and evaluated together in steady mode
+                elitism (int): Number of best members kept from one generation to the next in generational mode
+                race_chunk_size (int): Number of points evaluated between two checks against the worst member in
+                                       steady mode, children that can't beat it are rejected early, 0 disables racing
+                sampler (Sampler): Subset of the points fitness is calculated on, None to use all of them
+                full_elites (int): Number of best members (on the sample) checked on the whole dataset when the best
+                                   is reported, only used with a sampler
+                progress (bool): Whether progress bars are shown
+                checkpoint_path (str): Path the training state is saved to (in the background), None disables it
+                checkpoint_interval (int): Number of children bred between two checkpoints
+                instrumentation (Instrumentation): Counters, timers and hooks of the run, None turns them off
+                simplify (bool): Whether children are simplified (constant folding, algebraic identities) before
+                                 evaluation, and the best before it is reported
+                parsimony (float): Fitness added for every node of a genotype, to favor smaller trees
+                linear_scaling (bool): Whether the output of every chromosome is scaled by the a + b * gen that fits
+                                       the outputs best before its MSE is taken, racing is disabled then
+                dedup (str): What happens to chromosomes computing the same outputs (rounded) as a member,
+                             'reject' keeps them out of the population and regenerates them at initialization,
+                             'penalize' adds dedup_penalty to their fitness (always done in generational mode,
+                             which has no place to keep them out of), None disables the semantic index
+                dedup_penalty (float): Fitness added to a semantic duplicate, once, when it is evaluated
+                semantic_decimals (int): Number of decimals outputs are rounded to before they are compared
+                target_fitness (float): Training stops once the best fitness (on the whole dataset) is at most this,
+                                        None disables it
+                stagnation (int): Training stops once this many children are bred without the best fitness getting
+                                  better, 0 disables it
+                time_budget (float): Training stops once this many seconds went by since the initial population
+                                     started being evaluated (or the training resumed), None disables it
+                evaluation_budget (int): Training stops once this many fitness evaluations are computed,
+                                         0 disables it
         """
 
+        if mode not in ('steady', 'generational'):
+            raise ValueError(f"Unknown breeding mode: {mode}")
+
+        if dedup not in (None, 'reject', 'penalize'):
+            raise ValueError(f"Unknown deduplication: {dedup}")
+
         self.population = population
         self.iterations = iterations
-        self.inputs = inputs
-        self.outputs = outputs
+
+        # keep the points as contiguous arrays so fitness is evaluated column-wise
+        self.inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+        self.outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)
         self.epoch_feedback = epoch_feedback
 
-    def __one_step(self) -> None:
+        self.cache = FitnessCache(cache_size) if cache_size > 0 else None
+        self.__full_key = FitnessCache.dataset_key(self.inputs, self.outputs) if self.cache else None
+
+        self.workers = workers
+        self.__evaluator = None
+
+        self.mode = mode
+        self.batch_size = batch_size
+        self.elitism = elitism
+        self.race_chunk_size = race_chunk_size
+
+        self.sampler = sampler
+        self.full_elites = full_elites
+        self.__bred = 0
+        self.__take_sample()
+
+        self.progress = progress
+        self.step = 0
+        self.best_keeper = []
+        self.__history = []
+        self.__seen = set()
+        self.__next_feedback = 0
+        self.__initialized = False
+
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.__checkpoint_writer = CheckpointWriter(checkpoint_path) if checkpoint_path else None
+        self.__next_checkpoint = checkpoint_interval
+        self.__checkpointed_at = None
+
+        self.instrumentation = instrumentation
+
+        self.simplify = simplify
+        self.parsimony = parsimony
+        self.linear_scaling = linear_scaling
+
+        self.dedup = dedup
+        self.dedup_penalty = dedup_penalty
+        self.semantic_decimals = semantic_decimals
+
+        self.target_fitness = target_fitness
+        self.stagnation = stagnation
+        self.time_budget = time_budget
+        self.evaluation_budget = evaluation_budget
+        self.evaluations = 0
+        self.stop_reason = None
+        self.__best_fitness = math.inf
+        self.__improved_at = 0
+
+        # set from the event loop to stop astream's breeding thread between two steps
+        self.__cancelled = threading.Event()
+        self.__started = time.perf_counter()
+        self.__last_snapshot = self.__started
+
+    @property
+    def cache_hits(self) -> int:
+        """
+            Number of fitness evaluations answered by the cache,
+        """
+
+        return self.cache.hits if self.cache else 0
+
+    @property
+    def cache_misses(self) -> int:
+        """
+            Number of fitness evaluations that had to be computed,
+        """
+
+        return self.cache.misses if self.cache else 0
+
+    def __take_sample(self) -> None:
+        """
+            Method to take the points of the current sample out of the dataset,
+        """
+
+        if self.sampler is None:
+            self.__sample_inputs, self.__sample_outputs = self.inputs, self.outputs
+            self.__dataset_key = self.__full_key
+
+        else:
+            self.__sample_inputs = self.inputs[self.sampler.indices]
+            self.__sample_outputs = self.outputs[self.sampler.indices]
+            self.__dataset_key = f"{self.__full_key}:{self.sampler.key}"
+
+        if self.__evaluator is not None:
+            self.__evaluator.sample(None if self.sampler is None else self.sampler.indices)
+
+    def __next_sample(self, bred: int) -> None:
+        """
+            Method to move the sampler on once a generation is bred, re-evaluating the population if needed,
+
+            Parameters:
+                bred (int): Number of children bred in the last step
+        """
+
+        self.__bred += bred
+
+        # a steady-state generation is as many children as there are members
+        if self.mode == 'steady' and self.__bred < len(self.population.list):
+            return
+
+        self.__bred = 0
+
+        if self.sampler.next_generation():
+            self.__take_sample()
+            self.__evaluate_many(self.population.list)
+
+            if self.dedup is not None:
+                self.__penalize_duplicates(self.population.list)
+
+            self.population.reindex()
+
+    def __full_fitness(self, chromosome: Chromosome) -> float:
+        """
+            Method to get the fitness of a chromosome on the whole dataset,
+
+            Parameters:
+                chromosome (Chromosome): An evaluated chromosome
+
+            Returns:
+                The chromosome's fitness on all the points
+        """
+
+        if self.sampler is None or self.sampler.complete:
+            return chromosome.fitness
+
+        if chromosome.full_fitness is None and self.linear_scaling:
+            # the coefficients are fitted again on all the points, which is what the chromosome is judged on
+            chromosome.full_fitness, chromosome.scaling = chromosome.scaled_error(self.inputs, self.outputs,
+                                                                                  self.parsimony)
+
+        elif chromosome.full_fitness is None:
+            chromosome.full_fitness = chromosome.error(self.inputs, self.outputs, parsimony=self.parsimony)[0]
+
+        return chromosome.full_fitness
+
+    def __get_best(self) -> Chromosome:
+        """
+            Method to get the best chromosome of the population, judged on the whole dataset,
+            * With a sampler, only the best few members on the sample are checked on all the points.
+
+            Returns:
+                best: The best chromosome
+        """
+
+        if self.sampler is None or self.sampler.complete:
+            return get_best(self.population)
+
+        fitness = self.population.fitness
+        count = min(self.full_elites, len(fitness))
+        elites = np.argpartition(fitness, count - 1)[:count]
+
+        return min((self.population.list[i] for i in elites), key=self.__full_fitness)
+
+    def __evaluate_many(self, chromosomes: List[Chromosome], progress: Union[Callable[[int], None], None] = None,
+                        threshold: Union[float, None] = None) -> List[float]:
+        """
+            Method to calculate the fitness of chromosomes, going through the cache if enabled,
+            * Batches of more than one chromosome go to the worker processes if there are any.
+
+            Parameters:
+                chromosomes (list): Chromosomes to be evaluated
+                progress (callable): Called with the number of chromosomes finished
+                threshold (float): Fitness to beat, chromosomes that can't are rejected early (with racing enabled)
+
+            Returns:
+                The chromosomes' fitness, in the same order
+        """
+
+        pending = chromosomes
+
+        if self.cache is not None:
+            pending = []
+
+            for chromosome in chromosomes:
+                entry = self.cache.get(FitnessCache.key(chromosome.gen, self.__dataset_key))
+
+                if entry is None:
+                    pending.append(chromosome)
+
+                else:
+                    chromosome.fitness, chromosome.scaling, chromosome.semantics = entry
+                    chromosome.rejected = False
+
+            if progress is not None and len(chromosomes) > len(pending):
+                progress(len(chromosomes) - len(pending))
+
+        # the scaled MSE is only known once every point is evaluated
+        if not self.race_chunk_size or self.linear_scaling:
+            threshold = None
+
+        semantics = self.semantic_decimals if self.dedup is not None else None
+
+        if self.__evaluator is not None and len(pending) > 1:
+            self.__evaluator.evaluate(pending, progress, threshold, self.race_chunk_size)
+
+        else:
+            for chromosome in pending:
+                chromosome.calculate_fitness(self.__sample_inputs, self.__sample_outputs, threshold,
+                                             self.race_chunk_size, self.parsimony, self.linear_scaling, semantics)
+
+                if progress is not None:
+                    progress(1)
+
+        self.evaluations += len(pending)
+
+        if self.instrumentation is not None:
+            self.instrumentation.count("evaluations", len(pending))
+            self.instrumentation.count("cache_hits", len(chromosomes) - len(pending))
+            self.instrumentation.count("rejected", sum(bool(chromosome.rejected) for chromosome in pending))
+            self.instrumentation.count("invalid", sum(bool(chromosome.fitness == PENALTY_FITNESS)
+                                                      for chromosome in pending))
+
+        if self.cache is not None:
+            # a rejected fitness is only a lower bound, so it is not cached
+            for chromosome in pending:
+                if not chromosome.rejected:
+                    self.cache.put(FitnessCache.key(chromosome.gen, self.__dataset_key),
+                                   (chromosome.fitness, chromosome.scaling, chromosome.semantics))
+
+        return [chromosome.fitness for chromosome in chromosomes]
+
+    def __evaluate(self, chromosome: Chromosome) -> float:
+        """
+            Method to calculate the fitness of a chromosome, going through the cache if enabled,
+
+            Parameters:
+                chromosome (Chromosome): Chromosome to be evaluated
+
+            Returns:
+                The chromosome's fitness
+        """
+
+        return self.__evaluate_many([chromosome])[0]
+
+    def __breed(self, number: int) -> List[Chromosome]:
+        """
+            Method to breed new children from the population,
+
+            Parameters:
+                number (int): Number of children
+
+            Returns:
+                children: The children, not evaluated yet
+        """
+
+        # get two different selections of random members of population for every child
+        with self.__timer("selection"):
+            mothers = select_many(self.population, self.population.num_selected, number)
+            fathers = select_many(self.population, self.population.num_selected, number)
+
+        children = []
+
+        for mother, father in zip(mothers, fathers):
+            # cross over two chromosomes to obtain a child
+            with self.__timer("crossover"):
+                child = cross_over(mother, father, self.population.max_depth)
+
+            with self.__timer("mutation"):
+                child = mutate(child)
+
+            if self.simplify:
+                with self.__timer("simplification"):
+                    simplify(child)
+
+            children.append(child)
+
+        return children
+
+    def __replace_worst(self, chromosome: Chromosome) -> None:
+        """
+            Method to put an evaluated chromosome in place of the worst member if it is better,
+            semantic duplicates are handled as set by dedup,
+        """
+
+        if self.instrumentation is None:
+            self.population = replace_worst(self.population, chromosome, self.dedup, self.dedup_penalty)
+            return
+
+        position = self.population.worst_position()
+        self.population = replace_worst(self.population, chromosome, self.dedup, self.dedup_penalty)
+        self.instrumentation.count("replacements", int(self.population.list[position] is chromosome))
+
+    def __penalize_duplicates(self, chromosomes: List[Chromosome], start: int = 0) -> List[int]:
+        """
+            Method to find the chromosomes computing the same outputs as one before them,
+            dedup_penalty is added to their fitness in 'penalize' mode,
+
+            Parameters:
+                chromosomes (list): Evaluated chromosomes
+                start (int): Position of the first freshly evaluated chromosome, the ones before it were carried
+                             over (and penalized already if needed), they only count as seen
+
+            Returns:
+                Positions of the duplicates
+        """
+
+        seen = set()
+        duplicates = []
+
+        for i, chromosome in enumerate(chromosomes):
+            if chromosome.semantics is None:
+                continue
+
+            if i >= start and chromosome.semantics in seen:
+                duplicates.append(i)
+
+            seen.add(chromosome.semantics)
+
+        if self.dedup == 'penalize' or self.mode == 'generational':
+            for i in duplicates:
+                chromosomes[i].fitness += self.dedup_penalty
+
+        return duplicates
+
+    def __deduplicate(self, rounds: int = 10) -> None:
+        """
+            Method to deal with the semantic duplicates of the initial population,
+            in 'reject' mode they are replaced by new random members, for a few rounds at most,
+        """
+
+        for _ in range(rounds):
+            duplicates = self.__penalize_duplicates(self.population.list)
+
+            if self.dedup == 'penalize' or not duplicates:
+                break
+
+            fresh = self.population.create_population(len(duplicates), self.population.func_set,
+                                                      self.population.terminal_set, self.population.depth)
+            self.__evaluate_many(fresh)
+
+            for i, chromosome in zip(duplicates, fresh):
+                self.population.list[i] = chromosome
+
+    def __timer(self, name: str):
+        """
+            Method to time a phase if instrumentation is on,
+        """
+
+        if self.instrumentation is None:
+            return NO_TIMER
+
+        return self.instrumentation.timer(name)
+
+    def __one_step(self, number: int = 1) -> int:
         """
             Method to do one step of the algorithm,
+
+            Parameters:
+                number (int): Number of children bred in steady mode
+
+            Returns:
+                The number of children bred
         """
 
-        # get a selection of random members of population
-        mother = selection(self.population, self.population.num_selected)
+        if self.mode == 'generational':
+            return self.__one_generation()
 
-        # get a different selection of random members of population
-        father = selection(self.population, self.population.num_selected)
+        children = self.__breed(number)
 
-        # cross over two chromosomes to obtain a child
-        child = cross_over(mother, father, self.population.max_depth)
-        child = mutate(child)
+        # the worst member only gets better while the children are merged, so it is a safe threshold
+        with self.__timer("evaluation"):
+            self.__evaluate_many(children, threshold=get_worst(self.population).fitness)
 
-        child.calculate_fitness(self.inputs, self.outputs)
+        # replace the worst chromosomes with the new ones
+        with self.__timer("replacement"):
+            for child in children:
+                self.__replace_worst(child)
 
-        # replace the worst chromosome with a new one
-        self.population = replace_worst(self.population, child)
+        if self.instrumentation is not None:
+            self.instrumentation.count("steps")
+            self.instrumentation.count("children", len(children))
 
-    def train(self) -> List[Union[Chromosome, List[Union[List[Any], Any]]]]:
+        return len(children)
+
+    def __one_generation(self) -> int:
         """
-            Method to train the algorithm,
+            Method to replace the whole population with a new generation, keeping the elites,
+
+            Returns:
+                The number of children bred
+        """
+
+        order = np.argsort(self.population.fitness, kind='stable')[:self.elitism]
+        elites = [self.population.list[i] for i in order]
+
+        with self.__timer("breeding"):
+            children = self.__breed(len(self.population.list) - len(elites))
+
+        with self.__timer("evaluation"):
+            self.__evaluate_many(children)
+
+        with self.__timer("replacement"):
+            self.population.list = elites + children
+
+            # the elites were penalized when they were bred, only the children are
+            if self.dedup is not None:
+                self.__penalize_duplicates(self.population.list, len(elites))
+
+            self.population.reindex()
+
+        if self.instrumentation is not None:
+            self.instrumentation.count("steps")
+            self.instrumentation.count("children", len(children))
+
+        return len(children)
+
+    def open(self) -> None:
+        """
+            Method to start the worker processes, if any, before evolving,
+        """
+
+        if self.workers > 0 and self.__evaluator is None:
+            sample = self.population.list[0]
+            self.__evaluator = ParallelEvaluator(self.workers, sample.terminal_set, sample.func_set, self.inputs,
+                                                 self.outputs, parsimony=self.parsimony,
+                                                 scaling=self.linear_scaling,
+                                                 semantics=self.semantic_decimals if self.dedup is not None else None)
+
+            if self.sampler is not None:
+                self.__evaluator.sample(self.sampler.indices)
+
+    def close(self) -> None:
+        """
+            Method to stop the worker processes, if any,
+        """
+
+        if self.__evaluator is not None:
+            self.__evaluator.close()
+            self.__evaluator = None
+
+        if self.__checkpoint_writer is not None:
+            self.__checkpoint_writer.wait()
+
+    def initialize(self) -> None:
+        """
+            Method to calculate the fitness of the initial population and reset the training state,
         """
 
-        best_keeper = []
+        # the time budget counts the initial evaluation too, it is the slowest part on a big dataset
+        self.__started = time.perf_counter()
+        self.__last_snapshot = self.__started
 
         # progress bar for population
-        pbar1 = tqdm(total=len(self.population.list), desc="Population")
+        pbar1 = tqdm(total=len(self.population.list), desc="Population", disable=not self.progress)
 
         # calculate fitness of population
-        for i in range(len(self.population.list)):
-            self.population.list[i].calculate_fitness(self.inputs, self.outputs)
-            pbar1.update(n=1)
+        self.__evaluate_many(self.population.list, lambda n: pbar1.update(n=n))
+
+        if self.dedup is not None:
+            self.__deduplicate()
+
+        self.population.reindex()
+
+        pbar1.close()
+
+        # iterations count bred children, so both modes have the same budget
+        # (generational mode rounds it up to whole generations)
+        self.step = 0
+        self.best_keeper = []
+        self.__history = []
+        self.__seen = set()
+        self.__next_feedback = 0
+        self.__next_checkpoint = self.checkpoint_interval
+        self.__checkpointed_at = None
+        self.__best_fitness = math.inf
+        self.__improved_at = 0
+        self.stop_reason = None
+        self.__initialized = True
+
+    def __check_stop(self) -> Union[str, None]:
+        """
+            Method to check the stopping criteria after a step,
+
+            Returns:
+                The reason to stop, None to go on
+        """
 
-        progress_list = [i for i in range(self.iterations) if not (i % self.epoch_feedback)]
+        if self.evaluation_budget and self.evaluations >= self.evaluation_budget:
+            return 'evaluation_budget'
+
+        if self.time_budget is not None and time.perf_counter() - self.__started >= self.time_budget:
+            return 'time_budget'
+
+        if self.target_fitness is None and not self.stagnation:
+            return None
+
+        best = self.population.fitness[self.population.best_position()]
+
+        # with a sampler the best on the sample only may have reached the target, check it on all the points
+        if self.target_fitness is not None and best <= self.target_fitness and \
+                self.__full_fitness(self.__get_best()) <= self.target_fitness:
+            return 'target_fitness'
+
+        if best < self.__best_fitness:
+            self.__best_fitness = best
+            self.__improved_at = self.step
+
+        elif self.stagnation and self.step - self.__improved_at >= self.stagnation:
+            return 'stagnation'
+
+        return None
+
+    def __record(self, best: Chromosome) -> None:
+        """
+            Method to add the best of a feedback epoch to the history, remembering it if it is a new one,
+        """
 
-        max_progress = len(progress_list)
+        entry = [best.gen, self.__full_fitness(best)]
+        self.best_keeper.append(entry)
+
+        key = (tuple(entry[0]), entry[1])
+
+        if key not in self.__seen:
+            self.__seen.add(key)
+            self.__history.append(entry)
+
+    def __snapshot(self, gen: list, fitness: float) -> dict:
+        """
+            Method to take a lightweight snapshot of the training,
+
+            Parameters:
+                gen (list): Genotype of the best member
+                fitness (float): Fitness of the best member on the whole dataset
+
+            Returns:
+                Step, best genotype and fitness, timing, evaluations and stop reason (None while going on)
+        """
+
+        now = time.perf_counter()
+        snapshot = {"step": self.step, "best": list(gen), "fitness": float(fitness),
+                    "elapsed": now - self.__started, "epoch_time": now - self.__last_snapshot,
+                    "evaluations": self.evaluations, "stop_reason": self.stop_reason}
+        self.__last_snapshot = now
+
+        return snapshot
+
+    def __checkpoint(self) -> None:
+        """
+            Method to save the training state in the background and schedule the next checkpoint,
+        """
+
+        self.__checkpoint_writer.write(self.state())
+        self.__checkpointed_at = self.step
+        self.__next_checkpoint = (self.step // self.checkpoint_interval + 1) * self.checkpoint_interval
+
+    def __epochs(self, number: int) -> Generator[None, None, None]:
+        """
+            Method to breed more children, keeping track of the bests, until a stopping criterion is met,
+            yields every time the best of a feedback epoch is recorded
+
+            Parameters:
+                number (int): Number of children to breed, the total is capped by iterations
+        """
 
-        # for i in range(self.iterations):
-        #     if i % self.epoch_feedback == 0:
-        #         max_progress += 1
+        until = min(self.iterations, self.step + number)
 
-        print()
+        if self.progress:
+            print()
 
         # progress bar for best
-        pbar2 = tqdm(total=max_progress, desc="Best")
+        pbar2 = tqdm(total=len(range(self.__next_feedback, until, self.epoch_feedback)), desc="Best",
+                     disable=not self.progress)
+
+        try:
+            # find the bests
+            while self.step < until and self.stop_reason is None and not self.__cancelled.is_set():
+                if self.step >= self.__next_feedback:
+                    best_so_far = self.__get_best()
+                    self.__record(best_so_far)
+
+                    if self.instrumentation is not None:
+                        self.instrumentation.emit("epoch", step=self.step, best=" ".join(best_so_far.gen),
+                                                  best_fitness=self.best_keeper[-1][1],
+                                                  mean_size=float(np.mean(self.population.sizes)),
+                                                  mean_depth=float(np.mean(self.population.depths)),
+                                                  cache_hits=self.cache_hits, cache_misses=self.cache_misses,
+                                                  **(self.population.diversity() if self.dedup is not None else {}))
+
+                    # a batch may jump over more than one feedback epoch
+                    passed = self.step // self.epoch_feedback + 1 - self.__next_feedback // self.epoch_feedback
+                    self.__next_feedback += passed * self.epoch_feedback
+                    pbar2.update(n=passed)
+
+                    yield
+
+                bred = self.__one_step(min(self.batch_size, until - self.step))
+                self.step += bred
+
+                if self.sampler is not None:
+                    self.__next_sample(bred)
+
+                if self.__checkpoint_writer is not None and self.step >= self.__next_checkpoint:
+                    self.__checkpoint()
+
+                self.stop_reason = self.__check_stop()
+
+            if self.stop_reason is None and self.step >= self.iterations:
+                self.stop_reason = 'iterations'
+
+            # a stopped run always leaves a checkpoint to resume from, whatever the interval
+            if self.stop_reason is not None and self.__checkpoint_writer is not None and \
+                    self.__checkpointed_at != self.step:
+                self.__checkpoint()
+
+        finally:
+            pbar2.close()
+
+    def evolve(self, number: int) -> None:
+        """
+            Method to breed more children, keeping track of the bests, until a stopping criterion is met,
+
+            Parameters:
+                number (int): Number of children to breed, the total is capped by iterations
+        """
+
+        for _ in self.__epochs(number):
+            pass
+
+    def stream(self) -> Generator[dict, None, None]:
+        """
+            Method to train the algorithm step by step, yielding a snapshot at every feedback epoch,
+            * The last snapshot is taken when training stops and has its stop_reason, result() gives the rest.
+            * Stopping the iteration (break, close()) stops the training and the worker processes.
+
+            Returns:
+                A generator of snapshots, see __snapshot
+        """
+
+        self.open()
+
+        try:
+            if not self.__initialized:
+                self.initialize()
+
+            for _ in self.__epochs(self.iterations - self.step):
+                yield self.__snapshot(*self.best_keeper[-1])
+
+            best = self.__get_best()
+            fitness = self.__full_fitness(best)
+
+            if self.instrumentation is not None:
+                self.instrumentation.emit("end", step=self.step, best=" ".join(best.gen), best_fitness=fitness,
+                                          stop_reason=self.stop_reason)
+
+            yield self.__snapshot(best.gen, fitness)
+
+        finally:
+            self.close()
+
+    async def astream(self) -> AsyncGenerator[dict, None]:
+        """
+            Method to train the algorithm like stream, without blocking the event loop,
+            every feedback epoch is bred in a thread of the default executor,
+            * Use contextlib.aclosing (or aclose()) to stop the training before it ends, or cancel the consuming
+              task: the epoch being bred stops at the next step, then the worker processes are stopped.
+
+            Returns:
+                An asynchronous generator of snapshots, see stream
+        """
+
+        self.__cancelled.clear()
+        stream = self.stream()
+        pending = None
+
+        try:
+            while True:
+                # shielded, so a cancellation leaves the thread to be waited for instead of running on unseen
+                pending = asyncio.ensure_future(asyncio.to_thread(next, stream, None))
+                snapshot = await asyncio.shield(pending)
+
+                if snapshot is None:
+                    break
+
+                yield snapshot
+
+        finally:
+            if pending is not None and not pending.done():
+                self.__cancelled.set()
+                await asyncio.wait([pending])
+
+            await asyncio.to_thread(stream.close)
+            self.__cancelled.clear()
 
-        # find the bests
-        for i in range(self.iterations):
-            if i % self.epoch_feedback == 0:
-                best_so_far = get_best(self.population)
-                best_keeper.append([best_so_far.gen, best_so_far.fitness])
-                pbar2.update(n=1)
+    def state(self) -> dict:
+        """
+            Method to take a snapshot of everything needed to continue the training exactly where it is,
+
+            Returns:
+                The training state, see checkpoint.save_checkpoint
+        """
+
+        return {"size": self.population.size, "num_selected": self.population.num_selected,
+                "depth": self.population.depth, "max_depth": self.population.max_depth,
+                "terminal_set": self.population.terminal_set, "func_set": self.population.func_set,
+                "iterations": self.iterations, "epoch_feedback": self.epoch_feedback,
+                "step": self.step, "next_feedback": self.__next_feedback, "bred": self.__bred,
+                "evaluations": self.evaluations, "best_fitness": self.__best_fitness, "improved_at": self.__improved_at,
+                "stop_reason": self.stop_reason,
+                "dataset_shape": [len(self.inputs), self.inputs.shape[1], self.outputs.shape[1]],
+                "sampler_generation": None if self.sampler is None else self.sampler.generation,
+                "members": [list(chromosome.gen) for chromosome in self.population.list],
+                "fitness": np.array([chromosome.fitness for chromosome in self.population.list], dtype=float),
+                "scaling": np.array([(np.nan, np.nan) if chromosome.scaling is None else chromosome.scaling
+                                     for chromosome in self.population.list], dtype=float).reshape(-1, 2),
+                "best_keeper": [[list(gen), fitness] for gen, fitness in self.best_keeper],
+                "python_random": random.getstate(), "numpy_random": np.random.get_state()}
+
+    @classmethod
+    def resume(cls, path: str, inputs: list, outputs: list, iterations: Union[int, None] = None,
+               epoch_feedback: Union[int, None] = None, population: Union[Population, None] = None,
+               **kwargs) -> 'Algorithm':
+        """
+            Method to make an algorithm continuing a training from its checkpoint,
+            * To continue bit for bit, pass the same inputs, outputs and options (and a fresh sampler made
+              with the same seed) as the run that wrote the checkpoint.
+            * A run that had stopped stays stopped, train() gives its result without breeding, unless it stopped
+              on a limit that is raised now (iterations, evaluation_budget) or on its time budget.
+
+            Parameters:
+                path (str): Path of the checkpoint
+                inputs (list): Inputs (x list), as many points and columns as the checkpoint's run
+                outputs (list): Outputs (y list), as many points and columns as the checkpoint's run
+                iterations (int): Number of children bred in total, None keeps the checkpoint's
+                epoch_feedback (int): Number of epochs to show feedback, None or the checkpoint's
+                population (Population): Settings of the population the caller expects, its size, selection,
+                                         depths and sets must be the checkpoint's, None skips the check
+                kwargs: Other arguments of the algorithm
+
+            Returns:
+                algorithm: The algorithm, train() continues the run
+        """
+
+        state = load_checkpoint(path)
+
+        inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+        outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)
+
+        expected = {"dataset_shape": [len(inputs), inputs.shape[1], outputs.shape[1]],
+                    "epoch_feedback": epoch_feedback}
+
+        if population is not None:
+            expected.update({"size": population.size, "num_selected": population.num_selected,
+                             "depth": population.depth, "max_depth": population.max_depth,
+                             "terminal_set": list(population.terminal_set),
+                             "func_set": {arity: list(functions) for arity, functions in population.func_set.items()}})
+
+        mismatched = [key for key, value in expected.items() if value is not None and value != state[key]]
+
+        if mismatched:
+            raise ValueError(f"Checkpoint {path} does not match the run: {', '.join(mismatched)}")
+
+        members = []
+
+        for gen, fitness, scaling in zip(state["members"], state["fitness"].tolist(), state["scaling"].tolist()):
+            chromosome = Chromosome(state["terminal_set"], state["func_set"], state["depth"], None)
+            chromosome.gen = gen
+            chromosome.fitness = fitness
+            chromosome.scaling = None if np.isnan(scaling[0]) else tuple(scaling)
+            members.append(chromosome)
+
+        population = Population(state["size"], state["num_selected"], state["func_set"], state["terminal_set"],
+                                state["depth"], state["max_depth"], members)
+
+        algorithm = cls(population, state["iterations"] if iterations is None else iterations, inputs, outputs,
+                        state["epoch_feedback"], **kwargs)
+        algorithm.__restore(state)
+
+        return algorithm
+
+    def __restore(self, state: dict) -> None:
+        """
+            Method to put the training state of a checkpoint back,
+
+            Parameters:
+                state (dict): State read from a checkpoint
+        """
+
+        if self.sampler is not None and state["sampler_generation"] is not None:
+            self.sampler.seek(state["sampler_generation"])
+            self.__take_sample()
+
+        # semantics are not saved, hash the outputs of the members again (their fitness is kept as saved)
+        if self.dedup is not None:
+            for chromosome in self.population.list:
+                if chromosome.fitness != PENALTY_FITNESS:
+                    chromosome.semantics = semantic_key(chromosome.predict(self.__sample_inputs),
+                                                        self.semantic_decimals)
+
+        self.population.reindex()
+
+        self.step = state["step"]
+        self.best_keeper = []
+        self.__history = []
+        self.__seen = set()
+
+        for gen, fitness in state["best_keeper"]:
+            self.best_keeper.append([gen, fitness])
+            key = (tuple(gen), fitness)
+
+            if key not in self.__seen:
+                self.__seen.add(key)
+                self.__history.append(self.best_keeper[-1])
+
+        self.__next_feedback = state["next_feedback"]
+        self.__bred = state["bred"]
+        self.evaluations = state.get("evaluations", 0)
+        self.__best_fitness = state.get("best_fitness", math.inf)
+        self.__improved_at = state.get("improved_at", self.step)
+        self.__started = time.perf_counter()
+        self.__last_snapshot = self.__started
+        self.__next_checkpoint = (self.step // self.checkpoint_interval + 1) * self.checkpoint_interval
+        self.__checkpointed_at = self.step
+
+        # a run stopped by a limit goes on if it is raised, the time budget starts again with every session
+        self.stop_reason = state["stop_reason"]
+
+        if self.stop_reason == 'iterations' and self.step < self.iterations or \
+                self.stop_reason == 'evaluation_budget' and self.evaluations < (self.evaluation_budget or math.inf) or \
+                self.stop_reason == 'time_budget':
+            self.stop_reason = None
+
+        random.setstate(state["python_random"])
+        np.random.set_state(state["numpy_random"])
+
+        self.__initialized = True
+
+    def emigrants(self, number: int) -> List[list]:
+        """
+            Method to get copies of the best members of the population, to send to another population,
+
+            Parameters:
+                number (int): Number of members
+
+            Returns:
+                Genotypes of the best members
+        """
+
+        fitness = self.population.fitness
+        number = min(number, len(fitness))
+        best = np.argpartition(fitness, number - 1)[:number]
+
+        return [list(self.population.list[i].gen) for i in best]
+
+    def immigrate(self, genotypes: List[list]) -> None:
+        """
+            Method to let members of another population in, each one replaces the worst member if it is better,
+
+            Parameters:
+                genotypes (list): Genotypes of the new members
+        """
+
+        sample = self.population.list[0]
+        chromosomes = []
+
+        for gen in genotypes:
+            chromosome = Chromosome(sample.terminal_set, sample.func_set, sample.depth, None)
+            chromosome.gen = list(gen)
+            chromosomes.append(chromosome)
+
+        # the other population may use another sample of the points, so evaluate them here
+        self.__evaluate_many(chromosomes)
+
+        for chromosome in chromosomes:
+            self.__replace_worst(chromosome)
+
+    def __simplified(self, chromosome: Chromosome) -> Chromosome:
+        """
+            Method to get a simplified copy of a chromosome, evaluated again on the whole dataset if it changed,
+
+            Parameters:
+                chromosome (Chromosome): An evaluated chromosome, left as it is
+
+            Returns:
+                The simplified chromosome, or the same one if there was nothing to simplify
+        """
+
+        copy = Chromosome(chromosome.terminal_set, chromosome.func_set, chromosome.depth, None)
+        copy.gen = list(chromosome.gen)
+
+        if not simplify(copy):
+            return chromosome
+
+        copy.full_fitness = copy.calculate_fitness(self.inputs, self.outputs, parsimony=self.parsimony,
+                                                   scaling=self.linear_scaling)
+
+        return copy
+
+    def result(self) -> List[Union[Chromosome, List[Union[List[Any], Any]]]]:
+        """
+            Method to get the result of the training so far,
+
+            Returns:
+                The best chromosome and the history of bests, without repetitions
+        """
+
+        best = self.__get_best()
+
+        if self.simplify:
+            best = self.__simplified(best)
+
+        return [best, list(self.__history)]
+
+    def train(self) -> List[Union[Chromosome, List[Union[List[Any], Any]]]]:
+        """
+            Method to train the algorithm,
+        """
 
-            self.__one_step()
+        for _ in self.stream():
+            pass
 
-        return [get_best(self.population),
-                [best_keeper[i] for i in range(len(best_keeper)) if i == best_keeper.index(best_keeper[i])]]
+        return self.result()
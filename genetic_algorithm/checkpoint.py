@@ -0,0 +1,196 @@
+import os
+import json
+import struct
+import threading
+import numpy as np
+
+# file layout: magic, version, length-prefixed JSON header, then length-prefixed raw arrays in _ARRAYS order
+CHECKPOINT_MAGIC = b"GPCK"
+CHECKPOINT_VERSION = 1
+
+_ARRAYS = (("member_lengths", np.uint32), ("member_codes", np.uint16), ("member_fitness", np.float64),
+           ("member_scaling", np.float64), ("history_lengths", np.uint32), ("history_codes", np.uint16),
+           ("history_fitness", np.float64), ("python_random_keys", np.uint32), ("numpy_random_keys", np.uint32))
+
+
+def _encode(genotypes: list, codes: dict) -> tuple:
+    """
+        Function to encode genotypes as one flat array of symbol codes,
+
+        Parameters:
+            genotypes (list): Genotypes to be encoded
+            codes (dict): Code of every symbol, new symbols are added to it
+
+        Returns:
+            Length of every genotype and the codes of all of them one after the other
+    """
+
+    lengths = np.array([len(gen) for gen in genotypes], dtype=np.uint32)
+    flat = [codes.setdefault(symbol, len(codes)) for gen in genotypes for symbol in gen]
+
+    return lengths, np.array(flat, dtype=np.uint16)
+
+
+def _decode(lengths: np.ndarray, flat: np.ndarray, symbols: list) -> list:
+    """
+        Function to decode genotypes encoded by _encode,
+    """
+
+    flat = flat.tolist()
+    ends = np.cumsum(lengths).tolist()
+    starts = [0] + ends[:-1]
+
+    return [[symbols[code] for code in flat[start: end]] for start, end in zip(starts, ends)]
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """
+        Function to write the state of a training run to a file,
+        * The file is written next to the target and moved in place, so a crash never leaves half a checkpoint.
+
+        Parameters:
+            path (str): Path of the checkpoint
+            state (dict): State made by Algorithm.state
+    """
+
+    codes = {}
+    member_lengths, member_codes = _encode(state["members"], codes)
+    history_lengths, history_codes = _encode([gen for gen, _ in state["best_keeper"]], codes)
+
+    python_version, python_keys, python_gauss = state["python_random"]
+    numpy_name, numpy_keys, numpy_pos, numpy_has_gauss, numpy_gauss = state["numpy_random"]
+
+    arrays = {"member_lengths": member_lengths,
+              "member_codes": member_codes,
+              "member_fitness": np.asarray(state["fitness"], dtype=np.float64),
+              "member_scaling": np.asarray(state["scaling"], dtype=np.float64),
+              "history_lengths": history_lengths,
+              "history_codes": history_codes,
+              "history_fitness": np.array([fitness for _, fitness in state["best_keeper"]], dtype=np.float64),
+              "python_random_keys": np.array(python_keys, dtype=np.uint32),
+              "numpy_random_keys": np.asarray(numpy_keys, dtype=np.uint32)}
+
+    header = {key: value for key, value in state.items()
+              if key not in ("members", "fitness", "scaling", "best_keeper", "python_random", "numpy_random")}
+    header["func_set"] = {str(arity): functions for arity, functions in state["func_set"].items()}
+    header["symbols"] = sorted(codes, key=codes.get)
+    header["python_random"] = [python_version, python_gauss]
+    header["numpy_random"] = [numpy_name, int(numpy_pos), int(numpy_has_gauss), float(numpy_gauss)]
+
+    header = json.dumps(header).encode()
+    temporary = f"{path}.{os.getpid()}.tmp"
+
+    with open(temporary, "wb") as file:
+        file.write(CHECKPOINT_MAGIC + struct.pack("<HI", CHECKPOINT_VERSION, len(header)) + header)
+
+        for name, dtype in _ARRAYS:
+            data = np.ascontiguousarray(arrays[name], dtype=dtype).tobytes()
+            file.write(struct.pack("<Q", len(data)) + data)
+
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path: str) -> dict:
+    """
+        Function to read the state of a training run written by save_checkpoint,
+
+        Parameters:
+            path (str): Path of the checkpoint
+
+        Returns:
+            The state, as made by Algorithm.state
+    """
+
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if data[:4] != CHECKPOINT_MAGIC:
+        raise ValueError(f"{path} is not a checkpoint")
+
+    version, header_length = struct.unpack_from("<HI", data, 4)
+
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version}")
+
+    position = 10
+    state = json.loads(data[position: position + header_length].decode())
+    position += header_length
+
+    arrays = {}
+
+    for name, dtype in _ARRAYS:
+        (length,) = struct.unpack_from("<Q", data, position)
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=length // np.dtype(dtype).itemsize,
+                                     offset=position + 8)
+        position += 8 + length
+
+    symbols = state.pop("symbols")
+    python_version, python_gauss = state["python_random"]
+    numpy_name, numpy_pos, numpy_has_gauss, numpy_gauss = state["numpy_random"]
+
+    state["func_set"] = {int(arity): functions for arity, functions in state["func_set"].items()}
+    state["members"] = _decode(arrays["member_lengths"], arrays["member_codes"], symbols)
+    state["fitness"] = arrays["member_fitness"].copy()
+    state["scaling"] = arrays["member_scaling"].reshape(-1, 2)
+    state["best_keeper"] = [[gen, fitness] for gen, fitness in
+                            zip(_decode(arrays["history_lengths"], arrays["history_codes"], symbols),
+                                arrays["history_fitness"].tolist())]
+    state["python_random"] = (python_version, tuple(arrays["python_random_keys"].tolist()), python_gauss)
+    state["numpy_random"] = (numpy_name, arrays["numpy_random_keys"].copy(), numpy_pos, numpy_has_gauss,
+                             numpy_gauss)
+
+    return state
+
+
+class CheckpointWriter:
+    """
+        This is a class for representing a writer of checkpoints in a background thread.
+
+        Attributes:
+            path (str): Path of the checkpoint, overwritten by every new one
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+            Constructor for CheckpointWriter class,
+
+            Parameters:
+                path (str): Path of the checkpoint
+        """
+
+        self.path = path
+        self.__thread = None
+        self.__error = None
+
+    def __write(self, state: dict) -> None:
+        try:
+            save_checkpoint(self.path, state)
+
+        except BaseException as error:
+            self.__error = error
+
+    def write(self, state: dict) -> None:
+        """
+            Method to write a checkpoint in the background, waiting for the previous one first,
+
+            Parameters:
+                state (dict): State made by Algorithm.state, must not be changed afterwards
+        """
+
+        self.wait()
+
+        self.__thread = threading.Thread(target=self.__write, args=(state,), name="checkpoint-writer")
+        self.__thread.start()
+
+    def wait(self) -> None:
+        """
+            Method to wait until the last checkpoint is written, raising its error if it failed,
+        """
+
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
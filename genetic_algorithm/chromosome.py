@@ -1,9 +1,100 @@
 import random
-import warnings
+import hashlib
+import functools
 import numpy as np
-from typing import Tuple, Any, Union
+from typing import Tuple, Any, Union, Callable, List
+
+# fitness of a chromosome that is undefined (nan, inf) on any of the points
+PENALTY_FITNESS = 1e9
+
+
+def _cotangent(x):
+    return 1 / np.tan(x)
+
+
+# operators known by the compiled programs: symbol -> (arity, numpy function)
+OPERATORS = {'+': (2, np.add),
+             '-': (2, np.subtract),
+             '*': (2, np.multiply),
+             '^': (2, np.power),
+             '/': (2, np.true_divide),
+             'sin': (1, np.sin),
+             'cos': (1, np.cos),
+             'ln': (1, np.log),
+             'sqrt': (1, np.sqrt),
+             'tg': (1, np.tan),
+             'ctg': (1, _cotangent),
+             'e': (1, np.exp),
+             'tanh': (1, np.tanh),
+             'abs': (1, np.abs)}
+
+# opcode 0 reads an input column, every operator gets the next opcode and the last one pushes a constant
+OP_TERMINAL = 0
+OPCODES = {symbol: code for code, symbol in enumerate(OPERATORS, start=1)}
+OP_CONSTANT = len(OPERATORS) + 1
+OP_ARITY = [0] + [OPERATORS[symbol][0] for symbol in OPERATORS] + [0]
+OP_FUNCTION = [None] + [OPERATORS[symbol][1] for symbol in OPERATORS] + [None]
+
+
+@functools.lru_cache(maxsize=None)
+def terminal_column(symbol: str) -> int:
+    """
+        Function to get the input column a terminal ('x0', 'x1'...) reads, parsed once per terminal,
+    """
+
+    return int(symbol[1:])
+
+
+def make_terminal_set(n_inputs: int) -> List[str]:
+    """
+        Function to make the terminals of N input variables,
+
+        Parameters:
+            n_inputs (int): Number of input columns
+
+        Returns:
+            The terminals x0 ... x(N-1), terminal xi reads input column i
+    """
+
+    return [f"x{i}" for i in range(n_inputs)]
+
+
+def semantic_digest():
+    """
+        Function to start the hash of the outputs of a program, fed chunk by chunk with semantic_update,
+    """
+
+    return hashlib.blake2b(digest_size=8)
+
+
+def semantic_update(digest, values: np.ndarray, decimals: int) -> None:
+    """
+        Function to add outputs of a program to its hash, rounded so tiny float differences don't count,
+    """
+
+    # adding 0.0 turns -0.0 into 0.0, they are the same output (rounding huge outputs may overflow to inf)
+    with np.errstate(all='ignore'):
+        values = np.round(values, decimals) + 0.0
+
+    digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+
 
-warnings.filterwarnings("error")
+def semantic_key(values: np.ndarray, decimals: int) -> int:
+    """
+        Function to get the semantics of a program, the hash of its quantized outputs on the points,
+
+        Parameters:
+            values (np.ndarray): Outputs of the program on every point
+            decimals (int): Number of decimals outputs are rounded to
+
+        Returns:
+            The hash, equal for programs with the same quantized outputs
+    """
+
+    digest = semantic_digest()
+    semantic_update(digest, values, decimals)
+
+    return int.from_bytes(digest.digest(), "little")
 
 
 class Chromosome:
@@ -15,6 +106,12 @@ class Chromosome:
             funct_set (dict): Set of functions
             depth (int): Tree depth
             method (str): Method to generate the tree, default is full
+            fitness (float): Fitness of the last evaluation
+            rejected (bool): Whether the last evaluation stopped early, then fitness is only a lower bound
+            full_fitness (float): Fitness on the whole dataset when fitness is calculated on a sample of it
+            scaling (tuple): Coefficients (a, b) of the linear scaling a + b * gen, None if the output is not scaled
+            semantics (int): Hash of the quantized outputs of the last evaluation, see semantic_key,
+                             None if not hashed, invalid or rejected early
     """
 
     def __init__(self, terminal_set: list, funct_set: dict, depth: int, method: Union[str, None] = 'full') -> None:
@@ -33,6 +130,13 @@ class Chromosome:
         self.func_set = funct_set
         self.gen = []
         self.fitness = None
+        self.rejected = False
+        self.full_fitness = None
+        self.scaling = None
+        self.semantics = None
+        self._program = None
+        self._constants = None
+        self._nodes = None
 
         if method == 'grow':
             self.grow()
@@ -87,68 +191,190 @@ class Chromosome:
                 val = random.choice(self.terminal_set)
                 self.gen.append(val)
 
-    def eval(self, input_functions: list, position: int = 0) -> Tuple[Any, int]:
+    def invalidate(self, nodes: bool = True) -> None:
         """
-            Method to evaluate the current chromosome with a given input,
+            Method to drop the cached compiled program, must be called whenever self.gen changes,
 
             Parameters:
-                input_functions (list): Method input (x0, x1... xn)
-                position (int): current position in genotype 
+                nodes (bool): Whether the shape of the tree changed too, so the node index is dropped as well
         """
 
-        if self.gen[position] in self.terminal_set:
-            return input_functions[int(self.gen[position][1:])], position
+        self._program = None
+
+        if nodes:
+            self._nodes = None
+
+    def index_nodes(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+            Method to index every node of the genotype in a single pass,
 
-        elif self.gen[position] in self.func_set[2]:
-            position_op = position
-            left, position = self.eval(input_functions, position + 1)
-            right, position = self.eval(input_functions, position + 1)
+            Returns:
+                Subtree end (one past its last node), depth and arity of every node
+        """
 
-            if self.gen[position_op] == '+':
-                return left + right, position
+        arities = np.array([OPERATORS[symbol][0] if symbol in OPERATORS else 0 for symbol in self.gen],
+                           dtype=np.int32)
+        ends = np.zeros(len(self.gen), dtype=np.int32)
+        depths = np.zeros(len(self.gen), dtype=np.int32)
 
-            elif self.gen[position_op] == '-':
-                return left - right, position
+        # (start, children still missing) of every open function node
+        stack = []
 
-            elif self.gen[position_op] == '*':
-                return left * right, position
+        for i, arity in enumerate(arities.tolist()):
+            depths[i] = len(stack)
 
-            elif self.gen[position_op] == '^':
-                return left ** right, position
+            if arity:
+                stack.append([i, arity])
+                continue
 
-            elif self.gen[position_op] == '/':
-                return left / right, position
+            ends[i] = i + 1
 
-        else:
-            position_op = position
-            left, position = self.eval(input_functions, position + 1)
+            # a finished subtree may finish its parents too
+            while stack:
+                stack[-1][1] -= 1
 
-            if self.gen[position_op] == 'sin':
-                return np.sin(left), position
+                if stack[-1][1]:
+                    break
 
-            elif self.gen[position_op] == 'cos':
-                return np.cos(left), position
+                ends[stack.pop()[0]] = i + 1
 
-            elif self.gen[position_op] == 'ln':
-                return np.log(left), position
+        return ends, depths, arities
 
-            elif self.gen[position_op] == 'sqrt':
-                return np.sqrt(left), position
+    @property
+    def nodes(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+            The node index (ends, depths, arities) of the current genotype, built on first use,
+        """
+
+        if self._nodes is None:
+            self._nodes = self.index_nodes()
+
+        return self._nodes
+
+    def splice(self, mother: 'Chromosome', start_m: int, father: 'Chromosome', start_f: int) -> None:
+        """
+            Method to set the genotype to the mother's with one subtree swapped for one of the father's,
+            * The node index is spliced from the parents' instead of rebuilt.
+
+            Parameters:
+                mother (Chromosome): Chromosome giving the tree
+                start_m (int): Root of the mother's subtree to be replaced
+                father (Chromosome): Chromosome giving the subtree
+                start_f (int): Root of the father's subtree
+        """
+
+        m_ends, m_depths, m_arities = mother.nodes
+        f_ends, f_depths, f_arities = father.nodes
+
+        end_m = int(m_ends[start_m])
+        end_f = int(f_ends[start_f])
+        delta = (end_f - start_f) - (end_m - start_m)
+
+        self.gen = mother.gen[:start_m] + father.gen[start_f: end_f] + mother.gen[end_m:]
+        self.invalidate()
+
+        # nodes before the swapped subtree either end before it or are its ancestors
+        head_ends = m_ends[:start_m].copy()
+        head_ends[head_ends > start_m] += delta
+
+        ends = np.concatenate((head_ends, f_ends[start_f: end_f] - start_f + start_m, m_ends[end_m:] + delta))
+        depths = np.concatenate((m_depths[:start_m],
+                                 f_depths[start_f: end_f] - f_depths[start_f] + m_depths[start_m],
+                                 m_depths[end_m:]))
+        arities = np.concatenate((m_arities[:start_m], f_arities[start_f: end_f], m_arities[end_m:]))
+
+        self._nodes = ends, depths, arities
+
+    def compile(self) -> Tuple[np.ndarray, list]:
+        """
+            Method to compile the prefix genotype into a postfix program,
+            * The genotype is reversed, so operands are pushed before their operator.
 
-            elif self.gen[position_op] == 'tg':
-                return np.tan(left), position
+            Returns:
+                Array of (opcode, operand) rows, operand is the input column of a terminal or
+                the position of a constant in the list of constants, and the list of constants
+        """
+
+        program = np.zeros((len(self.gen), 2), dtype=np.int32)
+        constants = []
 
-            elif self.gen[position_op] == 'ctg':
-                return 1 / np.tan(left), position
+        for i, symbol in enumerate(reversed(self.gen)):
+            if symbol in self.terminal_set:
+                program[i, 1] = terminal_column(symbol)
 
-            elif self.gen[position_op] == 'e':
-                return np.exp(left), position
+            elif symbol in OPCODES:
+                program[i, 0] = OPCODES[symbol]
+
+            else:
+                program[i] = OP_CONSTANT, len(constants)
+                constants.append(float(symbol))
+
+        return program, constants
+
+    @property
+    def program(self) -> np.ndarray:
+        """
+            The compiled program of the current genotype, compiled on first use,
+        """
 
-            elif self.gen[position_op] == 'tanh':
-                return np.tanh(left), position
+        if self._program is None:
+            self._program, self._constants = self.compile()
+
+        return self._program
+
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        """
+            Method to run the compiled program on a whole set of inputs with a stack machine,
+            every operator is applied to a full column instead of a single point.
+            * Invalid operations (x / 0, ln(-1), overflow...) don't warn, they give nan or inf on their points.
+
+            Parameters:
+                inputs (np.ndarray): 2-D array of inputs, one row per point and one column per terminal
+
+            Returns:
+                The value of the program for every input row (may be a view of an input column)
+        """
 
-            elif self.gen[position_op] == 'abs':
-                return abs(left), position
+        stack = []
+        program = self.program
+
+        with np.errstate(all='ignore'):
+            for opcode, operand in program.tolist():
+                if opcode == OP_TERMINAL:
+                    stack.append(inputs[:, operand])
+
+                elif opcode == OP_CONSTANT:
+                    stack.append(np.full(len(inputs), self._constants[operand]))
+
+                elif OP_ARITY[opcode] == 1:
+                    stack[-1] = OP_FUNCTION[opcode](stack[-1])
+
+                else:
+                    # left operand is on top, the right one right below it
+                    left = stack.pop()
+                    stack[-1] = OP_FUNCTION[opcode](left, stack[-1])
+
+        return stack[0]
+
+    def predict(self, inputs) -> np.ndarray:
+        """
+            Method to evaluate the current genotype on all the given inputs,
+
+            Parameters:
+                inputs (list | np.ndarray): Inputs of the function we want to predict, one row per point
+
+            Returns:
+                1-D array with the value of self.gen for every input row
+        """
+
+        inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+
+        if self.scaling is not None:
+            with np.errstate(all='ignore'):
+                return self.scaling[0] + self.scaling[1] * self.run(inputs)
+
+        # a tree made of a single terminal returns a view, copy it to a fresh array
+        return np.array(self.run(inputs), dtype=float)
 
     def evaluate_arg(self, input_x: list):
         """
@@ -161,68 +387,208 @@ class Chromosome:
                 The value of self.gen evaluated at the given input
         """
 
-        return self.eval(input_x)[0]
+        return self.predict([input_x])[0]
 
-    def calculate_fitness(self, inputs: list, outputs: list):
+    def calculate_fitness(self, inputs: list, outputs: list, threshold: Union[float, None] = None,
+                          chunk_size: int = 1024, parsimony: float = 0.0, scaling: bool = False,
+                          semantics: Union[int, None] = None):
         """
             Method to calculate the fitness of a chromosome,
+            * With a threshold, points are evaluated in chunks and the evaluation stops as soon as
+              the fitness can't get below the threshold anymore.
 
             Parameters:
-                inputs (list): Inputs of the function we want to predict
-                outputs (list): Outputs of the function we want to predict
+                inputs (list | np.ndarray): Inputs of the function we want to predict, one row per point
+                outputs (list | np.ndarray): Outputs of the function we want to predict, one row per point
+                threshold (float): Fitness the chromosome has to beat, None to always evaluate every point
+                chunk_size (int): Number of points evaluated between two checks against the threshold
+                parsimony (float): Fitness added for every node of the genotype, to favor smaller trees
+                scaling (bool): Whether the output is linearly scaled to fit the outputs best, see scaled_error,
+                                the threshold is ignored then
+                semantics (int): Number of decimals the outputs are rounded to before they are hashed into
+                                 self.semantics, None to not hash them
 
             Returns:
-                self.fitness: The chromosome's fitness (calculated based on MSE)
+                self.fitness: The chromosome's fitness (calculated based on MSE), PENALTY_FITNESS if invalid
         """
 
-        diff = 0
+        digest = semantic_digest() if semantics is not None else None
+        observe = (lambda values: semantic_update(digest, values, semantics)) if digest is not None else None
+
+        if scaling:
+            self.fitness, self.scaling = self.scaled_error(inputs, outputs, parsimony, observe)
+            self.rejected = False
 
-        for i in range(len(inputs)):
-            try:
-                diff += (self.eval(inputs[i])[0] - outputs[i][0]) ** 2
+        else:
+            self.fitness, self.rejected = self.error(inputs, outputs, threshold, chunk_size, parsimony, observe)
+            self.scaling = None
 
-            except RuntimeWarning:
-                self.gen = []
+        if digest is None or self.rejected or self.fitness == PENALTY_FITNESS:
+            self.semantics = None
 
-                if random.random() > 0.5:
-                    self.grow()
+        else:
+            self.semantics = int.from_bytes(digest.digest(), "little")
 
-                else:
-                    self.full()
+        return self.fitness
 
-                self.calculate_fitness(inputs, outputs)
+    def error(self, inputs: list, outputs: list, threshold: Union[float, None] = None,
+              chunk_size: int = 1024, parsimony: float = 0.0,
+              observe: Union[Callable[[np.ndarray], None], None] = None) -> Tuple[float, bool]:
+        """
+            Method to calculate the MSE of a chromosome without storing it, see calculate_fitness,
+            observe is called with the outputs of every chunk of points, in order.
+
+            Returns:
+                The MSE plus the parsimony pressure (PENALTY_FITNESS if invalid) and
+                whether it stopped early at the threshold
+        """
 
         if len(inputs) == 0:
-            return 1e9
+            return PENALTY_FITNESS, False
 
-        self.fitness = diff / (len(inputs))
-        return self.fitness
+        inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+        outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)[:, 0]
+
+        if threshold is None:
+            chunk_size = len(inputs)
+
+        pressure = parsimony * len(self.gen)
+        diff = 0.0
+
+        for start in range(0, len(inputs), chunk_size):
+            stop = start + chunk_size
+
+            with np.errstate(all='ignore'):
+                values = self.run(inputs[start: stop])
+                diff += np.sum((values - outputs[start: stop]) ** 2)
+
+            if observe is not None:
+                observe(values)
+
+            # one invalid point makes the whole function invalid
+            if not np.isfinite(diff):
+                return PENALTY_FITNESS, False
+
+            # the squared error only grows, so the partial MSE is a lower bound of the final one
+            if threshold is not None and stop < len(inputs) and diff / len(inputs) + pressure >= threshold:
+                return diff / len(inputs) + pressure, True
+
+        return diff / (len(inputs)) + pressure, False
 
-    def __get_depth_aux(self, position: int = 0) -> Tuple[int, int]:
+    def scaled_error(self, inputs: list, outputs: list,
+                     parsimony: float = 0.0, observe: Union[Callable[[np.ndarray], None], None] = None) \
+            -> Tuple[float, Union[Tuple[float, float], None]]:
         """
-            Method to get the depth of a chromosome,
+            Method to calculate the MSE of the best linear scaling a + b * gen of a chromosome,
+            * a and b are the least-squares fit of the outputs on the values of the program, in closed form,
+              so offsets and scales don't have to be evolved.
 
             Parameters:
-                position (list): Inputs of the function we want to predict
+                inputs (list | np.ndarray): Inputs of the function we want to predict, one row per point
+                outputs (list | np.ndarray): Outputs of the function we want to predict, one row per point
+                parsimony (float): Fitness added for every node of the genotype, to favor smaller trees
+                observe (callable): Called with the scaled outputs
 
             Returns:
-                Chromosome's depth, last pos
+                The MSE plus the parsimony pressure (PENALTY_FITNESS if invalid) and the coefficients (a, b),
+                None if invalid
         """
 
-        elem = self.gen[position]
+        if len(inputs) == 0:
+            return PENALTY_FITNESS, None
 
-        if elem in self.func_set[2]:
-            left, position = self.__get_depth_aux(position + 1)
-            right, position = self.__get_depth_aux(position)
+        inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+        outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)[:, 0]
 
-            return 1 + max(left, right), position
+        with np.errstate(all='ignore'):
+            values = self.run(inputs)
 
-        elif elem in self.func_set[1]:
-            left, position = self.__get_depth_aux(position + 1)
-            return left + 1, position
+            # one invalid point makes the whole function invalid
+            if not np.all(np.isfinite(values)):
+                return PENALTY_FITNESS, None
 
-        else:
-            return 1, position + 1
+            values_mean = values.mean()
+            outputs_mean = outputs.mean()
+            centered = values - values_mean
+            variance = np.dot(centered, centered)
+
+            # a constant program can only fit the mean of the outputs
+            b = np.dot(centered, outputs - outputs_mean) / variance if variance > 0 else 0.0
+            a = outputs_mean - b * values_mean
+
+            values = a + b * values
+            diff = np.sum((values - outputs) ** 2)
+
+        if not np.isfinite(diff):
+            return PENALTY_FITNESS, None
+
+        if observe is not None:
+            observe(values)
+
+        return diff / len(inputs) + parsimony * len(self.gen), (float(a), float(b))
+
+    def target_errors(self, inputs: np.ndarray, outputs: np.ndarray, parsimony: float = 0.0,
+                      scaling: bool = False) -> Tuple[np.ndarray, Union[np.ndarray, None]]:
+        """
+            Method to calculate the MSE of a chromosome against several output columns at once,
+            the program runs once and every column only costs its own squared error.
+
+            Parameters:
+                inputs (np.ndarray): Inputs of the functions we want to predict, one row per point
+                outputs (np.ndarray): Outputs of the functions we want to predict, one row per point and
+                                      one column per target
+                parsimony (float): Fitness added for every node of the genotype, to favor smaller trees
+                scaling (bool): Whether the output is linearly scaled to fit every target best, see scaled_error
+
+            Returns:
+                The MSE plus the parsimony pressure of every target (PENALTY_FITNESS if invalid) and the
+                coefficients (a, b) of every target as a (targets, 2) array, None without scaling
+        """
+
+        inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+        outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)
+        targets = outputs.shape[1]
+
+        if len(inputs) == 0:
+            return np.full(targets, PENALTY_FITNESS), None
+
+        with np.errstate(all='ignore'):
+            values = self.run(inputs)
+
+            # one invalid point makes the whole function invalid, for every target
+            if not np.all(np.isfinite(values)):
+                return np.full(targets, PENALTY_FITNESS), None
+
+            coefficients = None
+
+            if scaling:
+                values_mean = values.mean()
+                centered = values - values_mean
+                variance = np.dot(centered, centered)
+                outputs_mean = outputs.mean(axis=0)
+
+                b = centered @ (outputs - outputs_mean) / variance if variance > 0 else np.zeros(targets)
+                a = outputs_mean - b * values_mean
+                coefficients = np.column_stack((a, b))
+
+                errors = np.mean((a + np.outer(values, b) - outputs) ** 2, axis=0)
+
+            else:
+                errors = np.mean((values[:, None] - outputs) ** 2, axis=0)
+
+        errors = np.where(np.isfinite(errors), errors + parsimony * len(self.gen), PENALTY_FITNESS)
+
+        return errors, coefficients
+
+    def __str__(self) -> str:
+        """
+            The genotype in prefix order, inside its linear scaling if there is one,
+        """
+
+        if self.scaling is None:
+            return " ".join(self.gen)
+
+        return f"{self.scaling[0]} + {self.scaling[1]} * ({' '.join(self.gen)})"
 
     def get_depth(self):
         """
@@ -232,4 +598,4 @@ class Chromosome:
                 Chromosome's depth
         """
 
-        return self.__get_depth_aux()[0] - 1
+        return int(self.nodes[1].max())
@@ -0,0 +1,224 @@
+import os
+import hashlib
+import itertools
+import numpy as np
+from typing import Callable, Iterator, Tuple, Union
+
+# characters of the legacy "(x, y)" text format that aren't part of the numbers
+_TEXT_SEPARATORS = str.maketrans("(),", "   ")
+
+
+def iter_text_points(path: str, chunk_size: int = 65536) -> Iterator[np.ndarray]:
+    """
+        Function to stream points from the legacy text format, one "(x0, ..., y)" point per line,
+
+        Parameters:
+            path (str): Path of the text file
+            chunk_size (int): Number of lines parsed at once
+
+        Returns:
+            Iterator over 2-D float64 arrays of at most chunk_size points, one column per value of a line
+    """
+
+    with open(path, "r") as file:
+        columns = None
+
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+
+            if not lines:
+                break
+
+            values = np.array("".join(lines).translate(_TEXT_SEPARATORS).split(), dtype=float)
+
+            if columns is None:
+                columns = len(lines[0].translate(_TEXT_SEPARATORS).split())
+
+            yield values.reshape(-1, columns)
+
+
+def read_text_points(path: str, n_outputs: int = 1, chunk_size: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Function to read all the points of a file in the legacy text format,
+
+        Parameters:
+            path (str): Path of the text file
+            n_outputs (int): Number of output columns, at the end of every line
+            chunk_size (int): Number of lines parsed at once
+
+        Returns:
+            inputs, outputs: float64 arrays, one row per point
+    """
+
+    chunks = list(iter_text_points(path, chunk_size))
+    points = np.concatenate(chunks) if chunks else np.empty((0, n_outputs + 1))
+
+    # column-major, so every input or output column is contiguous
+    points = np.asfortranarray(points)
+
+    return points[:, :-n_outputs], points[:, -n_outputs:]
+
+
+def save_dataset(path: str, inputs: np.ndarray, outputs: np.ndarray) -> None:
+    """
+        Function to save points in a binary format, .npy or raw float64 for any other extension,
+        * Points are stored column after column, so loaded columns are contiguous.
+
+        Parameters:
+            path (str): Path of the file
+            inputs (np.ndarray): Inputs, one row per point
+            outputs (np.ndarray): Outputs, one row per point
+    """
+
+    inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+    outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)
+    points = np.asfortranarray(np.hstack((inputs, outputs)))
+
+    if path.endswith(".npy"):
+        np.save(path, points)
+
+    else:
+        points.T.tofile(path)
+
+
+def load_dataset(path: str, n_outputs: int = 1, n_columns: Union[int, None] = None,
+                 mmap: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Function to load points saved by save_dataset, or in the legacy text format (.txt),
+
+        Parameters:
+            path (str): Path of the file
+            n_outputs (int): Number of output columns, the last ones
+            n_columns (int): Number of columns of a raw binary file, default is one input column
+            mmap (bool): Whether binary files are memory-mapped instead of read into memory
+
+        Returns:
+            inputs, outputs: float64 arrays, one row per point
+    """
+
+    if path.endswith(".txt"):
+        return read_text_points(path, n_outputs)
+
+    if path.endswith(".npy"):
+        points = np.load(path, mmap_mode="r" if mmap else None)
+
+    else:
+        n_columns = n_columns or n_outputs + 1
+        length = os.path.getsize(path) // (8 * n_columns)
+
+        if mmap:
+            points = np.memmap(path, dtype=np.float64, mode="r", shape=(n_columns, length)).T
+
+        else:
+            points = np.fromfile(path, dtype=np.float64).reshape(n_columns, length).T
+
+    return points[:, :-n_outputs], points[:, -n_outputs:]
+
+
+def write_text_points(path: str, inputs: np.ndarray, outputs: np.ndarray) -> None:
+    """
+        Function to write points in the legacy text format, one "(x, y)" point per line,
+
+        Parameters:
+            path (str): Path of the text file
+            inputs (np.ndarray): Inputs, one row per point
+            outputs (np.ndarray): Outputs, one row per point
+    """
+
+    inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+    outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)
+
+    lines = ["(" + ", ".join(map(str, point)) + ")" for point in np.hstack((inputs, outputs)).tolist()]
+
+    with open(path, "w") as file:
+        file.write("\n".join(lines))
+
+
+def evaluate_target(f: Callable, x: np.ndarray) -> np.ndarray:
+    """
+        Function to evaluate a target function on all the points at once,
+        * Functions that only take a single number (math.*, if/else on x) are called point by point.
+
+        Parameters:
+            f (callable): Target function
+            x (np.ndarray): 1-D array of points
+
+        Returns:
+            1-D float64 array of f(x)
+    """
+
+    try:
+        y = np.asarray(f(x), dtype=float)
+
+        if y.shape == x.shape:
+            return y
+
+    except (TypeError, ValueError):
+        pass
+
+    return np.array([f(value) for value in x.tolist()], dtype=float)
+
+
+def target_key(f: Callable) -> str:
+    """
+        Function to get an identity of a target function that changes whenever its code changes,
+
+        Parameters:
+            f (callable): Target function
+
+        Returns:
+            The function's name and a digest of its code
+    """
+
+    code = f.__code__
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(code.co_code)
+    digest.update(repr((code.co_consts, code.co_names)).encode())
+
+    return f"{f.__name__}-{digest.hexdigest()}"
+
+
+def dataset_cache_path(f: Callable, start: float, end: float, step: float, cache_dir: str = ".datasets") -> str:
+    """
+        Function to get the file the points of a target function over a range are cached in,
+    """
+
+    return os.path.join(cache_dir, f"{target_key(f)}_{start!r}_{end!r}_{step!r}.npy")
+
+
+def generate_dataset(f: Callable, start: float, end: float, step: float,
+                     cache_dir: Union[str, None] = ".datasets") -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Function to create the points of a target function over a range, cached on disk,
+
+        Parameters:
+            f (callable): Target function
+            start (float): Start of the range of x
+            end (float): End of the range of x (excluded)
+            step (float): Steps of forwarding from start of x to the end
+            cache_dir (str): Directory of the cached datasets, None disables the cache
+
+        Returns:
+            inputs, outputs: float64 arrays, one row per point
+    """
+
+    path = None
+
+    if cache_dir is not None:
+        path = dataset_cache_path(f, start, end, step, cache_dir)
+
+        if os.path.exists(path):
+            return load_dataset(path)
+
+    x = np.arange(start, end, step)
+    y = evaluate_target(f, x)
+
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # write next to the cache entry and move it in place, so concurrent runs never read half a file
+        temporary = f"{path[:-len('.npy')]}.{os.getpid()}.tmp.npy"
+        save_dataset(temporary, x, y)
+        os.replace(temporary, path)
+
+    return x.reshape(-1, 1), y.reshape(-1, 1)
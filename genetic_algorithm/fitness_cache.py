@@ -0,0 +1,104 @@
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Tuple
+
+
+class FitnessCache:
+    """
+        This is a class for representing a bounded cache of fitness values keyed by genotype,
+        a fitness value can be anything the evaluation gives back (like the fitness and the linear scaling).
+
+        Attributes:
+            size (int): Maximum number of genotypes kept, the least recently used one is evicted first
+            hits (int): Number of lookups that found a fitness
+            misses (int): Number of lookups that did not find a fitness
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+            Constructor for FitnessCache class,
+
+            Parameters:
+                size (int): Maximum number of genotypes kept
+        """
+
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @staticmethod
+    def dataset_key(inputs: np.ndarray, outputs: np.ndarray) -> str:
+        """
+            Method to get the identity of a dataset,
+
+            Parameters:
+                inputs (np.ndarray): Inputs of the dataset
+                outputs (np.ndarray): Outputs of the dataset
+
+            Returns:
+                A digest of the dataset content
+        """
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str((inputs.shape, outputs.shape)).encode())
+        digest.update(np.ascontiguousarray(inputs).tobytes())
+        digest.update(np.ascontiguousarray(outputs).tobytes())
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(gen: list, dataset_key: str) -> Tuple[str, str]:
+        """
+            Method to get the canonical key of a genotype on a dataset,
+
+            Parameters:
+                gen (list): Genotype of a chromosome
+                dataset_key (str): Identity of the dataset the fitness is computed on
+
+            Returns:
+                The cache key
+        """
+
+        return dataset_key, " ".join(gen)
+
+    def get(self, key: Tuple[str, str]) -> Any:
+        """
+            Method to look a fitness up, counts a hit or a miss,
+
+            Parameters:
+                key (tuple): Key made by FitnessCache.key
+
+            Returns:
+                The cached fitness, or None if it is not cached
+        """
+
+        fitness = self.__entries.get(key)
+
+        if fitness is None:
+            self.misses += 1
+
+        else:
+            self.hits += 1
+            self.__entries.move_to_end(key)
+
+        return fitness
+
+    def put(self, key: Tuple[str, str], fitness: Any) -> None:
+        """
+            Method to store a fitness, evicts the least recently used entry when full,
+
+            Parameters:
+                key (tuple): Key made by FitnessCache.key
+                fitness (float | tuple): Fitness of the genotype
+        """
+
+        self.__entries[key] = fitness
+        self.__entries.move_to_end(key)
+
+        if len(self.__entries) > self.size:
+            self.__entries.popitem(last=False)
@@ -1,3 +1,4 @@
+from typing import List
 from genetic_algorithm.chromosome import *
 from genetic_algorithm.population import Population
 
@@ -14,15 +15,7 @@ def traversal(position: int, chromosome: Chromosome) -> int:
             The value of traversal position
     """
 
-    if chromosome.gen[position] in chromosome.terminal_set:
-        return position + 1
-
-    elif chromosome.gen[position] in chromosome.func_set[1]:
-        return traversal(position + 1, chromosome)
-
-    else:
-        new_position = traversal(position + 1, chromosome)
-        return traversal(new_position, chromosome)
+    return int(chromosome.nodes[0][position])
 
 
 def mutate(chromosome: Chromosome):
@@ -38,16 +31,20 @@ def mutate(chromosome: Chromosome):
 
     position = np.random.randint(len(chromosome.gen))
 
-    if chromosome.gen[position] in chromosome.func_set[1] + chromosome.func_set[2]:
-        if chromosome.gen[position] in chromosome.func_set[1]:
-            chromosome.gen[position] = random.choice(chromosome.func_set[1])
+    arity = chromosome.nodes[2][position]
 
-        else:
-            chromosome.gen[position] = random.choice(chromosome.func_set[2])
+    # a symbol is only swapped for one of the same arity, so the shape of the tree is kept
+    if arity == 1:
+        chromosome.gen[position] = random.choice(chromosome.func_set[1])
+
+    elif arity == 2:
+        chromosome.gen[position] = random.choice(chromosome.func_set[2])
 
     else:
         chromosome.gen[position] = random.choice(chromosome.terminal_set)
 
+    chromosome.invalidate(nodes=False)
+
     return chromosome
 
 
@@ -63,14 +60,27 @@ def selection(population: Population, num_sel: int) -> Chromosome:
             best: The selected chromosome
     """
 
-    sample = random.sample(population.list, num_sel)
-    best = sample[0]
+    return select_many(population, num_sel, 1)[0]
 
-    for i in range(1, len(sample)):
-        if population.list[i].fitness < best.fitness:
-            best = population.list[i]
 
-    return best
+def select_many(population: Population, num_sel: int, number: int) -> List[Chromosome]:
+    """
+        Function to select many members of the population at once with tournaments,
+        * Every tournament draws num_sel members (with replacement) and keeps the fittest one.
+
+        Parameters:
+            population (Population): Population of chromosomes
+            num_sel (int): Number of chromosome selected from the population for each tournament
+            number (int): Number of tournaments
+
+        Returns:
+            The winner of every tournament
+    """
+
+    draws = np.random.randint(len(population.list), size=(number, num_sel))
+    winners = draws[np.arange(number), np.argmin(population.fitness[draws], axis=1)]
+
+    return [population.list[i] for i in winners]
 
 
 def cross_over(mother: Chromosome, father: Chromosome, max_depth: int) -> Chromosome:
@@ -91,10 +101,7 @@ def cross_over(mother: Chromosome, father: Chromosome, max_depth: int) -> Chromo
     start_m = np.random.randint(len(mother.gen))
     start_f = np.random.randint(len(father.gen))
 
-    end_m = traversal(start_m, mother)
-    end_f = traversal(start_f, father)
-
-    child.gen = mother.gen[:start_m] + father.gen[start_f: end_f] + mother.gen[end_m:]
+    child.splice(mother, start_m, father, start_f)
 
     if child.get_depth() > max_depth and random.random() > 0.2:
         child = Chromosome(mother.terminal_set, mother.func_set, mother.depth)
@@ -113,13 +120,7 @@ def get_best(population: Population) -> Chromosome:
             best: The best chromosome from population
     """
 
-    best = population.list[0]
-
-    for i in range(1, len(population.list)):
-        if population.list[i].fitness < best.fitness:
-            best = population.list[i]
-
-    return best
+    return population.list[population.best_position()]
 
 
 def get_worst(population: Population) -> Chromosome:
@@ -133,34 +134,35 @@ def get_worst(population: Population) -> Chromosome:
             worst: The worst chromosome from the population
     """
 
-    worst = population.list[0]
-
-    for i in range(1, len(population.list)):
-        if population.list[i].fitness > worst.fitness:
-            worst = population.list[i]
-
-    return worst
+    return population.list[population.worst_position()]
 
 
-def replace_worst(population: Population, chromosome: Chromosome) -> Population:
+def replace_worst(population: Population, chromosome: Chromosome, dedup: Union[str, None] = None,
+                  penalty: float = 0.1) -> Population:
     """
         Function to change the worst chromosome of the population with a new one,
 
         Parameters:
             population (Population): Population to get the best chromosome from
             chromosome (Chromosome): Chromosome to be added
+            dedup (str): What happens to a chromosome computing the same outputs as a member, 'reject' keeps it
+                         out, 'penalize' adds penalty to its fitness, None lets it in like any other
+            penalty (float): Fitness added to a semantic duplicate
 
         Returns:
             population: The replaced population
     """
 
-    worst = get_worst(population)
+    if dedup is not None and population.is_duplicate(chromosome):
+        if dedup == 'reject':
+            return population
+
+        chromosome.fitness += penalty
+
+    position = population.worst_position()
 
-    if chromosome.fitness < worst.fitness:
-        for i in range(len(population.list)):
-            if population.list[i].fitness == worst.fitness:
-                population.list[i] = chromosome
-                break
+    if chromosome.fitness < population.list[position].fitness:
+        population.replace(position, chromosome)
 
     return population
 
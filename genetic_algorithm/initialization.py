@@ -0,0 +1,115 @@
+import random
+import numpy as np
+from multiprocessing import Pool
+from typing import List, Tuple, Union
+
+# trees are built in chunks of this many, every chunk with its own random stream, so the trees only depend on
+# the seed and never on how the chunks are spread over worker processes
+CHUNK_SIZE = 256
+
+
+def build_tree(rng: random.Random, terminal_set: list, func_set: dict, depth: int, method: str) -> List[str]:
+    """
+        Function to build a random tree iteratively, in prefix order,
+
+        Parameters:
+            rng (random.Random): Random stream the tree is drawn from
+            terminal_set (list): Set of terminals
+            func_set (dict): Set of functions, by arity
+            depth (int): Depth of the tree
+            method (str): 'full' puts functions everywhere above the last level,
+                          'grow' may put a terminal anywhere below the root (30% of the time)
+
+        Returns:
+            gen: The genotype
+    """
+
+    functions = func_set[1] + func_set[2]
+    binary = set(func_set[2])
+
+    gen = []
+
+    # levels of the nodes still to be drawn, the next one in prefix order on top
+    pending = [0]
+
+    while pending:
+        level = pending.pop()
+
+        if level == depth or (method == 'grow' and level > 0 and rng.random() <= 0.3):
+            gen.append(rng.choice(terminal_set))
+
+        else:
+            symbol = rng.choice(functions)
+            gen.append(symbol)
+
+            # both children are on the same level, so the order they are pushed in doesn't matter
+            pending.extend([level + 1] * (2 if symbol in binary else 1))
+
+    return gen
+
+
+def ramp(number: int, depth: int, min_depth: int = 2) -> List[Tuple[int, str]]:
+    """
+        Function to get the depth and method of every tree of a ramped half-and-half population,
+        * Depths go round from min_depth to depth, and each depth alternates between full and grow.
+
+        Parameters:
+            number (int): Number of trees
+            depth (int): Maximum depth of a tree
+            min_depth (int): Minimum depth of a tree
+
+        Returns:
+            (depth, method) of every tree
+    """
+
+    depths = list(range(min(min_depth, depth), depth + 1))
+
+    return [(depths[(i // 2) % len(depths)], 'full' if i % 2 == 0 else 'grow') for i in range(number)]
+
+
+def _build_chunk(task: Tuple[list, dict, List[Tuple[int, str]], np.random.SeedSequence]) -> List[List[str]]:
+    """
+        Function to build a chunk of trees from its own random stream, runs in a worker process or inline,
+    """
+
+    terminal_set, func_set, shapes, seed = task
+    rng = random.Random(int.from_bytes(seed.generate_state(4).tobytes(), "little"))
+
+    return [build_tree(rng, terminal_set, func_set, depth, method) for depth, method in shapes]
+
+
+def ramped_half_and_half(number: int, terminal_set: list, func_set: dict, depth: int, min_depth: int = 2,
+                         seed: Union[int, None] = None, workers: int = 0) -> List[List[str]]:
+    """
+        Function to build the genotypes of a ramped half-and-half population,
+        * The same seed gives the same genotypes, whatever the number of workers.
+
+        Parameters:
+            number (int): Number of trees
+            terminal_set (list): Set of terminals
+            func_set (dict): Set of functions, by arity
+            depth (int): Maximum depth of a tree
+            min_depth (int): Minimum depth of a tree
+            seed (int): Seed of the random streams, None to draw one from the random module
+            workers (int): Number of worker processes building chunks of trees, 0 builds them in this process
+
+        Returns:
+            genotypes: The genotypes
+    """
+
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    shapes = ramp(number, depth, min_depth)
+    chunks = [shapes[i: i + CHUNK_SIZE] for i in range(0, number, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(terminal_set, func_set, chunk, chunk_seed) for chunk, chunk_seed in zip(chunks, seeds)]
+
+    if workers > 0 and len(tasks) > 1:
+        with Pool(min(workers, len(tasks))) as pool:
+            results = pool.map(_build_chunk, tasks)
+
+    else:
+        results = [_build_chunk(task) for task in tasks]
+
+    return [gen for result in results for gen in result]
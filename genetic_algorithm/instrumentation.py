@@ -0,0 +1,107 @@
+import json
+import time
+from collections import defaultdict
+from typing import Callable, Union
+
+
+class _Timer:
+    """
+        Context manager adding the time spent inside it to a timer of an Instrumentation,
+    """
+
+    __slots__ = ("timers", "name", "start")
+
+    def __init__(self, timers: dict, name: str) -> None:
+        self.timers = timers
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args) -> None:
+        self.timers[self.name] += time.perf_counter() - self.start
+
+
+class Instrumentation:
+    """
+        This is a class for representing counters and timers of a training run, reported to hooks and a log.
+        * Passing no Instrumentation to Algorithm turns all of it off.
+
+        Attributes:
+            counters (dict): Count of every event (evaluations, cache hits, rejected children...)
+            timers (dict): Seconds spent in every phase (selection, crossover, mutation, evaluation, replacement)
+            log_path (str): File every event is appended to as a JSON line, None to keep no log
+    """
+
+    def __init__(self, log_path: Union[str, None] = None) -> None:
+        """
+            Constructor for Instrumentation class,
+
+            Parameters:
+                log_path (str): File every event is appended to as a JSON line, None to keep no log
+        """
+
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(float)
+        self.log_path = log_path
+
+        self.__hooks = []
+        self.__log = open(log_path, "a") if log_path else None
+
+    def add_hook(self, hook: Callable[[str, dict], None]) -> None:
+        """
+            Method to register a function called with the name and data of every event,
+
+            Parameters:
+                hook (callable): Function called as hook(event, data)
+        """
+
+        self.__hooks.append(hook)
+
+    def count(self, name: str, number: int = 1) -> None:
+        """
+            Method to add to a counter,
+        """
+
+        self.counters[name] += number
+
+    def timer(self, name: str) -> _Timer:
+        """
+            Method to time a phase, to be used as `with instrumentation.timer(name):`,
+        """
+
+        return _Timer(self.timers, name)
+
+    def summary(self) -> dict:
+        """
+            Method to get the current value of every counter and timer,
+        """
+
+        return {"counters": dict(self.counters), "timers": dict(self.timers)}
+
+    def emit(self, event: str, **data) -> None:
+        """
+            Method to report an event to the hooks and the log, with the current counters and timers,
+
+            Parameters:
+                event (str): Name of the event
+                data: Data of the event
+        """
+
+        data.update(self.summary())
+
+        for hook in self.__hooks:
+            hook(event, data)
+
+        if self.__log is not None:
+            self.__log.write(json.dumps({"event": event, "time": time.time(), **data}) + "\n")
+            self.__log.flush()
+
+    def close(self) -> None:
+        """
+            Method to close the log,
+        """
+
+        if self.__log is not None:
+            self.__log.close()
+            self.__log = None
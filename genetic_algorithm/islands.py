@@ -0,0 +1,217 @@
+import queue
+import random
+import numpy as np
+import multiprocessing
+from typing import Any, List, Union
+from genetic_algorithm.algorithm import Algorithm
+from genetic_algorithm.chromosome import Chromosome
+from genetic_algorithm.population import Population
+
+
+def _run_island(index: int, settings: dict, inboxes: list, results: multiprocessing.Queue) -> None:
+    """
+        Function to evolve one island in its own process, exchanging migrants with the others,
+
+        Parameters:
+            index (int): Index of the island
+            settings (dict): Settings of the island model, see IslandModel.train
+            inboxes (list): Queue of incoming migrants of every island
+            results (Queue): Queue the result of the island is put on
+    """
+
+    # migrants still on their way when the run ends are dropped, don't wait for them on exit
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+
+    random.seed(settings["seed"] + index)
+    np.random.seed(settings["seed"] + index)
+
+    # a seeded ramped initialization would give every island the same members
+    population_args = dict(settings["population_args"])
+
+    if population_args.get("seed") is not None:
+        population_args["seed"] += index
+
+    population = Population(**population_args)
+    algorithm = Algorithm(population, settings["iterations"], settings["inputs"], settings["outputs"],
+                          settings["epoch_feedback"], progress=False, **settings["algorithm_args"])
+
+    islands = len(inboxes)
+    rng = random.Random(settings["seed"] * 7919 + index)
+
+    algorithm.open()
+
+    try:
+        algorithm.initialize()
+
+        # whether the previous island on the ring still sends migrants
+        upstream = True
+
+        while algorithm.step < algorithm.iterations and algorithm.stop_reason is None:
+            algorithm.evolve(settings["migration_interval"])
+
+            if algorithm.step >= algorithm.iterations or islands == 1:
+                continue
+
+            if algorithm.stop_reason is not None:
+                # the next island waits for a batch every interval, tell it none are coming anymore
+                if settings["topology"] == 'ring':
+                    inboxes[(index + 1) % islands].put(None)
+
+                continue
+
+            emigrants = algorithm.emigrants(settings["emigrants"])
+
+            if settings["topology"] == 'ring':
+                inboxes[(index + 1) % islands].put(emigrants)
+
+                # every island sends once per interval, so exactly one batch is coming from the previous one
+                immigrants = inboxes[index].get() if upstream else []
+
+                if immigrants is None:
+                    upstream = False
+                    immigrants = []
+
+            else:
+                inboxes[rng.choice([i for i in range(islands) if i != index])].put(emigrants)
+
+                immigrants = []
+
+                while True:
+                    try:
+                        immigrants += inboxes[index].get_nowait()
+
+                    except queue.Empty:
+                        break
+
+            algorithm.immigrate(immigrants)
+
+        best, found_functions = algorithm.result()
+
+    finally:
+        algorithm.close()
+
+    # with a sampler, the fitness on the whole dataset is kept apart
+    fitness = best.fitness if best.full_fitness is None else best.full_fitness
+
+    results.put((index, best.gen, fitness, found_functions, best.scaling, algorithm.stop_reason))
+
+
+class IslandModel:
+    """
+        This is a class for representing populations evolved side by side in separate processes,
+        exchanging their best members from time to time.
+
+        Attributes:
+            islands (int): Number of islands (processes)
+            population_args (dict): Arguments of the Population of every island
+            iterations (int): Number of iterations of every island
+            inputs (np.ndarray): Inputs (x list), one row per point
+            outputs (np.ndarray): Outputs (y list), one row per point
+            epoch_feedback (int): Number of epochs to keep the best of every island
+            migration_interval (int): Number of children bred between two migrations
+            emigrants (int): Number of best members sent by every island at a migration
+            topology (str): 'ring' sends to the next island, 'random' to a random other one
+            seed (int): Seed of the first island, the next ones use the following seeds
+            algorithm_args (dict): Other arguments of the Algorithm of every island
+            stop_reasons (list): Why every island stopped, see Algorithm.stop_reason, filled by train
+    """
+
+    def __init__(self, islands: int, population_args: dict, iterations: int, inputs: Any, outputs: Any,
+                 epoch_feedback: int = 100, migration_interval: int = 1000, emigrants: int = 5,
+                 topology: str = 'ring', seed: int = 0, **algorithm_args) -> None:
+        """
+            Constructor for IslandModel class,
+
+            Parameters:
+                islands (int): Number of islands (processes)
+                population_args (dict): Arguments of the Population of every island
+                iterations (int): Number of iterations of every island
+                inputs (list | np.ndarray): Inputs (x list)
+                outputs (list | np.ndarray): Outputs (y list)
+                epoch_feedback (int): Number of epochs to keep the best of every island
+                migration_interval (int): Number of children bred between two migrations
+                emigrants (int): Number of best members sent by every island at a migration
+                topology (str): 'ring' or 'random'
+                seed (int): Seed of the first island, the next ones use the following seeds
+                algorithm_args: Other arguments of the Algorithm of every island
+        """
+
+        if topology not in ('ring', 'random'):
+            raise ValueError(f"Unknown migration topology: {topology}")
+
+        self.islands = islands
+        self.population_args = population_args
+        self.iterations = iterations
+        self.inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+        self.outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)
+        self.epoch_feedback = epoch_feedback
+        self.migration_interval = migration_interval
+        self.emigrants = emigrants
+        self.topology = topology
+        self.seed = seed
+        self.algorithm_args = algorithm_args
+        self.stop_reasons = []
+
+    def train(self) -> List[Union[Chromosome, List[Union[List[Any], Any]]]]:
+        """
+            Method to train every island and merge their results,
+
+            Returns:
+                The best chromosome of all islands and the merged history of bests
+        """
+
+        settings = {"population_args": self.population_args, "iterations": self.iterations,
+                    "inputs": self.inputs, "outputs": self.outputs, "epoch_feedback": self.epoch_feedback,
+                    "migration_interval": self.migration_interval, "emigrants": self.emigrants,
+                    "topology": self.topology, "seed": self.seed, "algorithm_args": self.algorithm_args}
+
+        inboxes = [multiprocessing.Queue() for _ in range(self.islands)]
+        results = multiprocessing.Queue()
+
+        processes = [multiprocessing.Process(target=_run_island, args=(i, settings, inboxes, results))
+                     for i in range(self.islands)]
+
+        for process in processes:
+            process.start()
+
+        # read the results before joining, a process can't end while its result is still in the pipe
+        collected = []
+
+        while len(collected) < len(processes):
+            try:
+                collected.append(results.get(timeout=1))
+
+            except queue.Empty:
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    for process in processes:
+                        process.terminate()
+
+                    raise RuntimeError("An island process failed")
+
+        collected.sort(key=lambda result: result[0])
+
+        for process in processes:
+            process.join()
+
+        _, gen, fitness, _, scaling, _ = min(collected, key=lambda result: result[2])
+        self.stop_reasons = [result[5] for result in collected]
+
+        best = Chromosome(self.population_args["terminal_set"], self.population_args["func_set"],
+                          self.population_args["depth"], None)
+        best.gen = gen
+        best.fitness = fitness
+        best.scaling = scaling
+
+        # merge the histories epoch by epoch
+        found_functions = []
+        seen = set()
+        histories = [result[3] for result in collected]
+
+        for epoch in range(max(len(history) for history in histories)):
+            for history in histories:
+                if epoch < len(history) and (tuple(history[epoch][0]), history[epoch][1]) not in seen:
+                    seen.add((tuple(history[epoch][0]), history[epoch][1]))
+                    found_functions.append(history[epoch])
+
+        return [best, found_functions]
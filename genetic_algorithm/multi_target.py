@@ -0,0 +1,218 @@
+import numpy as np
+from tqdm import tqdm
+from typing import List
+from genetic_algorithm.ga_operations import *
+from genetic_algorithm.population import Population
+from genetic_algorithm.simplify import simplify as simplify_chromosome
+
+
+class MultiTargetAlgorithm:
+    """
+        This is a class for representing the algorithm fitting several output columns (targets) in one run,
+        every target has its own population, but they all share the trees and their evaluation: the initial trees
+        are evaluated once for all the targets, and every child is bred from one target's population (in turn),
+        evaluated once against all the targets and offered to every population.
+        * It breeds one child at a time in this process, without the fitness cache, worker processes, semantic
+          deduplication, stopping criteria or checkpoints of Algorithm.
+
+        Attributes:
+            populations (list): Population of every target, made by initialize
+            iterations (int): Number of children bred, over all the targets
+            inputs (np.ndarray): Inputs (x list), one row per point and one column per variable
+            outputs (np.ndarray): Outputs (y list), one row per point and one column per target
+            epoch_feedback (int): Number of epochs to show feedback
+            parsimony (float): Fitness added for every node of a genotype, 0 disables the parsimony pressure
+            linear_scaling (bool): Whether the output of every tree is scaled to fit every target best
+            simplify (bool): Whether children are simplified before evaluation, and the bests before they are reported
+            progress (bool): Whether progress bars are shown
+            step (int): Number of children bred so far
+            evaluations (int): Number of trees evaluated so far (each one against every target)
+            best_keepers (list): Genotype and fitness of the best member at every feedback epoch, for every target
+    """
+
+    def __init__(self, population: Population, iterations: int, inputs: list, outputs: list,
+                 epoch_feedback: int = 100, parsimony: float = 0.0, linear_scaling: bool = False,
+                 simplify: bool = False, progress: bool = True) -> None:
+        """
+            Constructor for MultiTargetAlgorithm class,
+
+            Parameters:
+                population (Population): Initial trees, shared by every target, and the settings of the
+                                         population of every target
+                iterations (int): Number of children bred, over all the targets
+                inputs (list): Inputs (x list), one row per point
+                outputs (list): Outputs (y list), one row per point and one column per target
+                epoch_feedback (int): Number of epochs to show feedback
+                parsimony (float): Fitness added for every node of a genotype, to favor smaller trees
+                linear_scaling (bool): Whether the output of every tree is scaled by the a + b * gen that fits each
+                                       target best before its MSE is taken
+                simplify (bool): Whether children are simplified before evaluation, and the bests before they are
+                                 reported
+                progress (bool): Whether progress bars are shown
+        """
+
+        self.population = population
+        self.iterations = iterations
+
+        self.inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+        self.outputs = np.asarray(outputs, dtype=float).reshape(len(outputs), -1)
+        self.epoch_feedback = epoch_feedback
+
+        self.parsimony = parsimony
+        self.linear_scaling = linear_scaling
+        self.simplify = simplify
+        self.progress = progress
+
+        self.populations = []
+        self.step = 0
+        self.evaluations = 0
+        self.best_keepers = [[] for _ in range(self.outputs.shape[1])]
+
+    @property
+    def targets(self) -> int:
+        """
+            Number of targets,
+        """
+
+        return self.outputs.shape[1]
+
+    def __evaluate(self, chromosome: Chromosome) -> Tuple[np.ndarray, Union[np.ndarray, None]]:
+        """
+            Method to evaluate a tree once against every target,
+
+            Returns:
+                The fitness and the linear scaling (None without scaling) of every target
+        """
+
+        self.evaluations += 1
+
+        return chromosome.target_errors(self.inputs, self.outputs, self.parsimony, self.linear_scaling)
+
+    @staticmethod
+    def __member(chromosome: Chromosome, fitness: float, scaling: Union[np.ndarray, None]) -> Chromosome:
+        """
+            Method to make the member of one target's population out of an evaluated tree,
+            * The genotype and its node index are shared, they are never changed in place once evaluated.
+        """
+
+        member = Chromosome(chromosome.terminal_set, chromosome.func_set, chromosome.depth, None)
+        member.gen = chromosome.gen
+        member._nodes = chromosome._nodes
+        member.fitness = float(fitness)
+        member.scaling = None if scaling is None else (float(scaling[0]), float(scaling[1]))
+
+        return member
+
+    def initialize(self) -> None:
+        """
+            Method to evaluate the initial trees once and make the population of every target out of them,
+        """
+
+        template = self.population
+        errors = np.empty((len(template.list), self.targets))
+        scalings = [None] * len(template.list)
+
+        for i, chromosome in enumerate(tqdm(template.list, desc="Population", disable=not self.progress)):
+            errors[i], scalings[i] = self.__evaluate(chromosome)
+
+        self.populations = []
+
+        for target in range(self.targets):
+            members = [self.__member(chromosome, errors[i, target],
+                                     None if scalings[i] is None else scalings[i][target])
+                       for i, chromosome in enumerate(template.list)]
+
+            population = Population(template.size, template.num_selected, template.func_set, template.terminal_set,
+                                    template.depth, template.max_depth, members)
+            population.reindex()
+            self.populations.append(population)
+
+        self.step = 0
+        self.best_keepers = [[] for _ in range(self.targets)]
+
+    def __one_step(self) -> None:
+        """
+            Method to breed a child from the population of the next target in turn and offer it to every target,
+        """
+
+        population = self.populations[self.step % self.targets]
+
+        mother, father = select_many(population, population.num_selected, 2)
+        child = mutate(cross_over(mother, father, population.max_depth))
+
+        if self.simplify:
+            simplify_chromosome(child)
+
+        errors, scalings = self.__evaluate(child)
+
+        for target, population in enumerate(self.populations):
+            # only make a member for the targets the child gets into
+            if errors[target] < get_worst(population).fitness:
+                replace_worst(population, self.__member(child, errors[target],
+                                                        None if scalings is None else scalings[target]))
+
+    def __best(self, target: int) -> Chromosome:
+        """
+            Method to get the best chromosome of a target, simplified if enabled,
+        """
+
+        best = get_best(self.populations[target])
+
+        if not self.simplify:
+            return best
+
+        copy = Chromosome(best.terminal_set, best.func_set, best.depth, None)
+        copy.gen = list(best.gen)
+
+        if not simplify_chromosome(copy):
+            return best
+
+        errors, scalings = copy.target_errors(self.inputs, self.outputs[:, [target]], self.parsimony,
+                                              self.linear_scaling)
+
+        return self.__member(copy, errors[0], None if scalings is None else scalings[0])
+
+    def train(self) -> List[List[Union[Chromosome, List[Union[List[Any], Any]]]]]:
+        """
+            Method to train the algorithm,
+
+            Returns:
+                The best chromosome and the history of bests (without repetitions) of every target
+        """
+
+        self.initialize()
+
+        if self.progress:
+            print()
+
+        # progress bar for best
+        pbar2 = tqdm(total=len(range(0, self.iterations, self.epoch_feedback)), desc="Best",
+                     disable=not self.progress)
+
+        while self.step < self.iterations:
+            if self.step % self.epoch_feedback == 0:
+                for target, population in enumerate(self.populations):
+                    best_so_far = get_best(population)
+                    self.best_keepers[target].append([best_so_far.gen, best_so_far.fitness])
+
+                pbar2.update(n=1)
+
+            self.__one_step()
+            self.step += 1
+
+        pbar2.close()
+
+        results = []
+
+        for target, best_keeper in enumerate(self.best_keepers):
+            seen = set()
+            history = []
+
+            for gen, fitness in best_keeper:
+                if (tuple(gen), fitness) not in seen:
+                    seen.add((tuple(gen), fitness))
+                    history.append([gen, fitness])
+
+            results.append([self.__best(target), history])
+
+        return results
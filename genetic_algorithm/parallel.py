@@ -0,0 +1,232 @@
+import numpy as np
+from multiprocessing import Pool, shared_memory
+from typing import Callable, List, Tuple, Union
+from genetic_algorithm.chromosome import Chromosome
+
+# state of a worker process, filled once by __init_worker
+_worker = {}
+
+
+def _share(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, tuple]:
+    """
+        Function to copy an array into a new shared memory block,
+
+        Parameters:
+            array (np.ndarray): Array to be shared
+
+        Returns:
+            The shared memory block and the spec workers need to attach to it
+    """
+
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach(spec: tuple) -> np.ndarray:
+    """
+        Function to attach a worker to a shared array,
+
+        Parameters:
+            spec (tuple): Name, shape and dtype of the shared array
+
+        Returns:
+            The shared array
+    """
+
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    _worker.setdefault("blocks", []).append(block)
+
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _init_worker(terminal_set: list, func_set: dict, inputs_spec: tuple, outputs_spec: tuple,
+                 parsimony: float = 0.0, scaling: bool = False, semantics: Union[int, None] = None) -> None:
+    """
+        Function to set a worker process up, runs once per worker,
+    """
+
+    _worker["terminal_set"] = terminal_set
+    _worker["parsimony"] = parsimony
+    _worker["scaling"] = scaling
+    _worker["semantics"] = semantics
+    _worker["func_set"] = func_set
+    _worker["inputs"] = _attach(inputs_spec)
+    _worker["outputs"] = _attach(outputs_spec)
+
+
+def _gather(spec: Union[tuple, None]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Function to get the points a worker evaluates on, a sample is gathered once and kept until it changes,
+
+        Parameters:
+            spec (tuple): Id, name, shape and dtype of the shared indices of the sample, None for all the points
+
+        Returns:
+            The inputs and outputs of the points
+    """
+
+    if spec is None:
+        return _worker["inputs"], _worker["outputs"]
+
+    sample_id, name, shape, dtype = spec
+
+    if _worker.get("sample_id") != sample_id:
+        block = shared_memory.SharedMemory(name=name)
+        indices = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        _worker["sample"] = (_worker["inputs"][indices], _worker["outputs"][indices])
+        _worker["sample_id"] = sample_id
+
+        # the gathered points are copies, so the indices are not needed anymore
+        del indices
+        block.close()
+
+    return _worker["sample"]
+
+
+def _evaluate_batch(task: Tuple[List[list], Union[float, None], int, Union[tuple, None]]) \
+        -> List[Tuple[float, bool, Union[Tuple[float, float], None], Union[int, None]]]:
+    """
+        Function to calculate the fitness of a batch of genotypes inside a worker,
+
+        Parameters:
+            task (tuple): Genotypes to be evaluated, threshold and chunk size of the evaluation,
+                          spec of the sample to evaluate on (None for all the points), see _gather
+
+        Returns:
+            The fitness, whether it was rejected early, the linear scaling and the semantics, for every chromosome
+    """
+
+    genotypes, threshold, chunk_size, sample = task
+    inputs, outputs = _gather(sample)
+
+    results = []
+
+    for gen in genotypes:
+        chromosome = Chromosome(_worker["terminal_set"], _worker["func_set"], 0, None)
+        chromosome.gen = gen
+        chromosome.calculate_fitness(inputs, outputs, threshold, chunk_size, _worker["parsimony"],
+                                     _worker["scaling"], _worker["semantics"])
+        results.append((chromosome.fitness, chromosome.rejected, chromosome.scaling, chromosome.semantics))
+
+    return results
+
+
+class ParallelEvaluator:
+    """
+        This is a class for representing a pool of processes calculating fitness,
+        the dataset is put in shared memory once and only genotypes travel between processes,
+        * The indices of a sample are shared once per sample, every worker gathers its points once.
+
+        Attributes:
+            workers (int): Number of worker processes
+            chunk_size (int): Number of genotypes sent to a worker at once
+    """
+
+    def __init__(self, workers: int, terminal_set: list, func_set: dict, inputs: np.ndarray, outputs: np.ndarray,
+                 chunk_size: int = 64, parsimony: float = 0.0, scaling: bool = False,
+                 semantics: Union[int, None] = None) -> None:
+        """
+            Constructor for ParallelEvaluator class,
+
+            Parameters:
+                workers (int): Number of worker processes
+                terminal_set (list): Set of terminals of the chromosomes
+                func_set (dict): Set of functions of the chromosomes
+                inputs (np.ndarray): Inputs of the function we want to predict
+                outputs (np.ndarray): Outputs of the function we want to predict
+                chunk_size (int): Number of genotypes sent to a worker at once
+                parsimony (float): Fitness added for every node of a genotype, see Chromosome.calculate_fitness
+                scaling (bool): Whether the outputs are linearly scaled, see Chromosome.calculate_fitness
+                semantics (int): Decimals the outputs are hashed with, see Chromosome.calculate_fitness
+        """
+
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        self.__inputs_block, inputs_spec = _share(np.ascontiguousarray(inputs, dtype=float))
+        self.__outputs_block, outputs_spec = _share(np.ascontiguousarray(outputs, dtype=float))
+
+        # indices of the current sample in shared memory and the spec workers get them from, None for all the points
+        self.__sample_id = 0
+        self.__sample_block = None
+        self.__sample_spec = None
+
+        self.__pool = Pool(workers, initializer=_init_worker,
+                           initargs=(terminal_set, func_set, inputs_spec, outputs_spec, parsimony, scaling, semantics))
+
+    def sample(self, indices: Union[np.ndarray, None]) -> None:
+        """
+            Method to set the points the next evaluations are on, the workers gather them once,
+
+            Parameters:
+                indices (np.ndarray): Indices of the points of the sample, None for the whole dataset
+        """
+
+        # no evaluation is running, so no worker is still reading the indices of the previous sample
+        if self.__sample_block is not None:
+            self.__sample_block.close()
+            self.__sample_block.unlink()
+            self.__sample_block = None
+            self.__sample_spec = None
+
+        if indices is None:
+            return
+
+        self.__sample_id += 1
+        self.__sample_block, spec = _share(np.ascontiguousarray(indices, dtype=np.int64))
+        self.__sample_spec = (self.__sample_id,) + spec
+
+    def evaluate(self, chromosomes: List[Chromosome], progress: Union[Callable[[int], None], None] = None,
+                 threshold: Union[float, None] = None, race_chunk_size: int = 1024) -> List[float]:
+        """
+            Method to calculate the fitness of chromosomes in the worker processes,
+
+            Parameters:
+                chromosomes (list): Chromosomes to be evaluated, updated in place
+                progress (callable): Called with the number of chromosomes finished after every chunk
+                threshold (float): Fitness the chromosomes have to beat, see Chromosome.calculate_fitness
+                race_chunk_size (int): Number of points evaluated between two checks against the threshold
+
+            Returns:
+                Fitness of the chromosomes, in the same order
+        """
+
+        tasks = [([chromosome.gen for chromosome in chromosomes[i: i + self.chunk_size]], threshold, race_chunk_size,
+                  self.__sample_spec) for i in range(0, len(chromosomes), self.chunk_size)]
+
+        position = 0
+
+        for results in self.__pool.imap(_evaluate_batch, tasks):
+            for fitness, rejected, scaling, semantics in results:
+                chromosomes[position].fitness = fitness
+                chromosomes[position].rejected = rejected
+                chromosomes[position].scaling = scaling
+                chromosomes[position].semantics = semantics
+                position += 1
+
+            if progress is not None:
+                progress(len(results))
+
+        return [chromosome.fitness for chromosome in chromosomes]
+
+    def close(self) -> None:
+        """
+            Method to stop the workers and free the shared memory,
+        """
+
+        self.__pool.close()
+        self.__pool.join()
+        self.sample(None)
+
+        for block in (self.__inputs_block, self.__outputs_block):
+            block.close()
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
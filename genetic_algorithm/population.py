@@ -1,6 +1,10 @@
-from typing import List
+import heapq
+import math
+from collections import Counter
+from typing import List, Union
 from genetic_algorithm.chromosome import *
 from genetic_algorithm.chromosome import Chromosome
+from genetic_algorithm.initialization import ramped_half_and_half
 
 
 class Population:
@@ -14,10 +18,20 @@ class Population:
             terminal_set (list): Set of terminals for the population
             depth (int): Initial depth of a tree
             max_depth (int): Maximum depth of a tree
+            init (str): How new members are made, 'random' or 'ramped' (ramped half-and-half)
+            min_depth (int): Minimum depth of a new tree in ramped initialization
+            seed (int): Seed of the initial members in ramped initialization, None to draw it from random
+            workers (int): Number of worker processes building new members in ramped initialization
+            list (list): Members of the population, call reindex() after changing it other than by replace()
+            fitness (np.ndarray): Fitness of every member, invalid fitness is stored as inf
+            sizes (np.ndarray): Number of nodes of every member
+            depths (np.ndarray): Tree depth of every member
+            semantics (Counter): Number of members with every semantics, members without one are not counted
     """
 
     def __init__(self, size: int, num_selected: int, func_set: dict, terminal_set: list, depth: int,
-                 max_depth: int) -> None:
+                 max_depth: int, members: Union[List[Chromosome], None] = None, init: str = 'random',
+                 min_depth: int = 2, seed: Union[int, None] = None, workers: int = 0) -> None:
         """
             Constructor for population class,
 
@@ -28,14 +42,221 @@ class Population:
                 terminal_set (list): Set of terminals for the population
                 depth (int): Initial depth of a tree
                 max_depth (int): Maximum depth of a tree
+                members (list): Existing chromosomes to make the population of, None to create new ones
+                init (str): How new members are made, 'random' draws full or grow trees of the initial depth
+                            from the random module, 'ramped' builds ramped half-and-half trees of min_depth up to
+                            the initial depth from seeded random streams (the same for any number of workers)
+                min_depth (int): Minimum depth of a new tree in ramped initialization
+                seed (int): Seed of the initial members in ramped initialization, None to draw it from random
+                workers (int): Number of worker processes building new members in ramped initialization
         """
 
+        if init not in ('random', 'ramped'):
+            raise ValueError(f"Unknown initialization: {init}")
+
         self.size = size
         self.max_depth = max_depth
         self.num_selected = num_selected
-        self.list = self.create_population(self.size, func_set, terminal_set, depth)
+        self.func_set = func_set
+        self.terminal_set = terminal_set
+        self.depth = depth
+        self.init = init
+        self.min_depth = min_depth
+        self.seed = seed
+        self.workers = workers
+        self.list = members if members is not None else self.create_population(self.size, func_set, terminal_set,
+                                                                                  depth, seed)
+
+        # fitness, size and depth of the members side by side with self.list
+        self.__fitness = np.empty(0)
+        self.__sizes = np.empty(0, dtype=np.int64)
+        self.__depths = np.empty(0, dtype=np.int64)
+        self.__semantics = Counter()
+
+        # min-heap for the best and max-heap for the worst member, entries are (key, position, version),
+        # an entry is stale once its position's version has moved on
+        self.__best_heap = []
+        self.__worst_heap = []
+        self.__versions = []
+        self.__indexed = False
+
+    @staticmethod
+    def __fitness_key(chromosome: Chromosome) -> float:
+        """
+            Method to get the sort key of a member, invalid fitness sorts as the worst,
+        """
+
+        fitness = chromosome.fitness
+        return math.inf if fitness is None or math.isnan(fitness) else fitness
+
+    def reindex(self) -> None:
+        """
+            Method to rebuild the fitness index from scratch, after the members changed in place,
+        """
+
+        self.__fitness = np.array([self.__fitness_key(chromosome) for chromosome in self.list], dtype=float)
+        self.__sizes = np.array([len(chromosome.gen) for chromosome in self.list], dtype=np.int64)
+        self.__depths = np.array([chromosome.get_depth() for chromosome in self.list], dtype=np.int64)
+        self.__semantics = Counter(chromosome.semantics for chromosome in self.list
+                                   if chromosome.semantics is not None)
+
+        self.__rebuild_heaps()
+
+    def __rebuild_heaps(self) -> None:
+        """
+            Method to build both heaps again from the fitness array, dropping every stale entry,
+        """
+
+        keys = self.__fitness.tolist()
+
+        self.__versions = [0] * len(keys)
+        self.__best_heap = [(key, i, 0) for i, key in enumerate(keys)]
+        self.__worst_heap = [(-key, i, 0) for i, key in enumerate(keys)]
+
+        heapq.heapify(self.__best_heap)
+        heapq.heapify(self.__worst_heap)
+
+        self.__indexed = True
+
+    @property
+    def fitness(self) -> np.ndarray:
+        """
+            Fitness of every member, invalid fitness is stored as inf,
+        """
+
+        if not self.__indexed:
+            self.reindex()
+
+        return self.__fitness
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """
+            Number of nodes of every member,
+        """
+
+        if not self.__indexed:
+            self.reindex()
+
+        return self.__sizes
+
+    @property
+    def depths(self) -> np.ndarray:
+        """
+            Tree depth of every member,
+        """
+
+        if not self.__indexed:
+            self.reindex()
+
+        return self.__depths
+
+    @property
+    def semantics(self) -> Counter:
+        """
+            Number of members with every semantics (hash of their outputs),
+        """
+
+        if not self.__indexed:
+            self.reindex()
+
+        return self.__semantics
+
+    def is_duplicate(self, chromosome: Chromosome) -> bool:
+        """
+            Method to check whether a member already computes the same outputs as a chromosome,
+
+            Parameters:
+                chromosome (Chromosome): An evaluated chromosome
+
+            Returns:
+                Whether its semantics is in the population, False if it has none
+        """
+
+        return chromosome.semantics is not None and chromosome.semantics in self.semantics
+
+    def diversity(self) -> dict:
+        """
+            Method to get statistics on the behaviours of the members,
+
+            Returns:
+                Number of members, members with a semantics, distinct semantics among them and duplicates
+        """
+
+        hashed = sum(self.semantics.values())
+
+        return {"members": len(self.list), "hashed": hashed, "distinct": len(self.semantics),
+                "duplicates": hashed - len(self.semantics)}
+
+    def __top(self, heap: list) -> int:
+        """
+            Method to get the position at the top of a heap, dropping stale entries,
+        """
+
+        if not self.__indexed:
+            self.reindex()
+
+        while heap[0][2] != self.__versions[heap[0][1]]:
+            heapq.heappop(heap)
+
+        return heap[0][1]
+
+    def best_position(self) -> int:
+        """
+            Method to get the position of the best member, the first one among equal fitness,
+        """
 
-    def create_population(self, number: int, func_set: dict, terminal_set: list, depth: int) -> List[Chromosome]:
+        return self.__top(self.__best_heap)
+
+    def worst_position(self) -> int:
+        """
+            Method to get the position of the worst member, the first one among equal fitness,
+        """
+
+        return self.__top(self.__worst_heap)
+
+    def replace(self, position: int, chromosome: Chromosome) -> None:
+        """
+            Method to put an evaluated chromosome at a position of the population,
+
+            Parameters:
+                position (int): Position to be replaced
+                chromosome (Chromosome): The new member
+        """
+
+        if not self.__indexed:
+            self.list[position] = chromosome
+            return
+
+        old = self.list[position].semantics
+        self.list[position] = chromosome
+
+        if old is not None:
+            self.__semantics[old] -= 1
+
+            if not self.__semantics[old]:
+                del self.__semantics[old]
+
+        if chromosome.semantics is not None:
+            self.__semantics[chromosome.semantics] += 1
+
+        key = self.__fitness_key(chromosome)
+        version = self.__versions[position] + 1
+        self.__versions[position] = version
+
+        self.__fitness[position] = key
+        self.__sizes[position] = len(chromosome.gen)
+        self.__depths[position] = chromosome.get_depth()
+
+        heapq.heappush(self.__best_heap, (key, position, version))
+        heapq.heappush(self.__worst_heap, (-key, position, version))
+
+        # stale entries are only dropped when they reach the top, so compact from time to time
+        if len(self.__best_heap) > 4 * len(self.list):
+            self.__rebuild_heaps()
+
+    def create_population(self, number: int, func_set: dict, terminal_set: list, depth: int,
+                          seed: Union[int, None] = None) -> List[Chromosome]:
         """
             Method to create population,
 
@@ -44,6 +265,7 @@ class Population:
                 func_set (dict): Set of functions for the population
                 terminal_set (list): Set of terminals for the population
                 depth (int): Initial depth of a tree
+                seed (int): Seed of the members in ramped initialization, None to draw it from random
 
             Returns:
                 pop_list: List of population
@@ -52,6 +274,15 @@ class Population:
 
         pop_list = []
 
+        if self.init == 'ramped':
+            for gen in ramped_half_and_half(number, terminal_set, func_set, depth, self.min_depth, seed,
+                                            self.workers):
+                chromosome = Chromosome(terminal_set, func_set, depth, None)
+                chromosome.gen = gen
+                pop_list.append(chromosome)
+
+            return pop_list
+
         for i in range(number):
             if random.random() > 0.5:
                 pop_list.append(Chromosome(terminal_set, func_set, depth, 'grow'))
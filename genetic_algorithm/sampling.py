@@ -0,0 +1,113 @@
+import numpy as np
+from typing import Union
+
+
+class Sampler:
+    """
+        This is a class for representing the subset of points the fitness is calculated on.
+
+        Attributes:
+            total (int): Number of points of the whole dataset
+            size (int): Number of points in a sample (the first one for progressive mode)
+            mode (str): 'fixed' keeps one random subset, 'rotating' cycles through disjoint subsets,
+                        'progressive' grows the subset every generation until it is the whole dataset
+            growth (float): Factor the sample grows by every generation in progressive mode
+            generation (int): Number of generations the sampler has been advanced
+            indices (np.ndarray): Sorted indices of the points in the current sample
+    """
+
+    def __init__(self, total: int, size: int, mode: str = 'fixed', growth: float = 2.0,
+                 seed: Union[int, None] = None) -> None:
+        """
+            Constructor for Sampler class,
+
+            Parameters:
+                total (int): Number of points of the whole dataset
+                size (int): Number of points in a sample
+                mode (str): 'fixed', 'rotating' or 'progressive'
+                growth (float): Factor the sample grows by every generation in progressive mode
+                seed (int): Seed of the random order of the points
+        """
+
+        if mode not in ('fixed', 'rotating', 'progressive'):
+            raise ValueError(f"Unknown sampling mode: {mode}")
+
+        self.total = total
+        self.size = min(size, total)
+        self.mode = mode
+        self.growth = growth
+        self.generation = 0
+
+        # every sample is taken from one random order of the points
+        self.__order = np.random.default_rng(seed).permutation(total)
+        self.indices = self.__sample()
+
+    @property
+    def key(self) -> str:
+        """
+            Identity of the current sample, to tell fitness calculated on different samples apart,
+        """
+
+        if self.mode == 'fixed':
+            return f"fixed:{self.size}"
+
+        if self.mode == 'rotating':
+            return f"rotating:{self.size}:{self.generation % self.__folds()}"
+
+        return f"progressive:{len(self.indices)}"
+
+    @property
+    def complete(self) -> bool:
+        """
+            Whether the current sample is the whole dataset,
+        """
+
+        return len(self.indices) == self.total
+
+    def __folds(self) -> int:
+        return -(-self.total // self.size)
+
+    def __sample(self) -> np.ndarray:
+        """
+            Method to get the indices of the sample of the current generation,
+        """
+
+        if self.mode == 'fixed':
+            indices = self.__order[:self.size]
+
+        elif self.mode == 'rotating':
+            start = (self.generation % self.__folds()) * self.size
+            indices = self.__order[start: start + self.size]
+
+        else:
+            size = min(self.total, int(self.size * self.growth ** self.generation))
+            indices = self.__order[:size]
+
+        # sorted indices keep reading the dataset sequential
+        return np.sort(indices)
+
+    def next_generation(self) -> bool:
+        """
+            Method to move on to the sample of the next generation,
+
+            Returns:
+                Whether the sample changed
+        """
+
+        old_key = self.key
+
+        self.generation += 1
+        self.indices = self.__sample()
+
+        return self.key != old_key
+
+    def seek(self, generation: int) -> None:
+        """
+            Method to jump to the sample of a given generation,
+
+            Parameters:
+                generation (int): Number of generations from the start
+        """
+
+        self.generation = generation
+        self.indices = self.__sample()
@@ -0,0 +1,171 @@
+import math
+import numpy as np
+from typing import List, Tuple, Union
+from genetic_algorithm.chromosome import *
+from genetic_algorithm.chromosome import Chromosome
+
+# a subtree while simplifying: its prefix tokens and its value if it is a constant
+Subtree = Tuple[List[str], Union[float, None]]
+
+# unary operators whose result is never negative, abs() of them is a no-op
+NON_NEGATIVE = {'abs', 'sqrt', 'e'}
+
+
+def constant(value: float) -> Subtree:
+    """
+        Function to make a constant subtree,
+    """
+
+    return [repr(float(value))], float(value)
+
+
+def fold(symbol: str, operands: List[float]) -> Union[Subtree, None]:
+    """
+        Function to compute an operator on constant operands,
+
+        Parameters:
+            symbol (str): The operator
+            operands (list): Values of its operands, left first
+
+        Returns:
+            The constant subtree, or None if the result is not a finite number
+    """
+
+    with np.errstate(all='ignore'):
+        value = float(OPERATORS[symbol][1](*[np.float64(operand) for operand in operands]))
+
+    return constant(value) if math.isfinite(value) else None
+
+
+def simplify_unary(symbol: str, child: Subtree) -> Subtree:
+    """
+        Function to simplify a unary operator applied to an already simplified subtree,
+    """
+
+    tokens, value = child
+
+    if value is not None:
+        folded = fold(symbol, [value])
+
+        if folded is not None:
+            return folded
+
+    # abs(abs(x)) = abs(x), abs(sqrt(x)) = sqrt(x), abs(e(x)) = e(x)
+    if symbol == 'abs' and tokens[0] in NON_NEGATIVE:
+        return child
+
+    # ln(e(x)) = x
+    if symbol == 'ln' and tokens[0] == 'e':
+        return tokens[1:], None
+
+    return [symbol] + tokens, None
+
+
+def simplify_binary(symbol: str, left: Subtree, right: Subtree) -> Subtree:
+    """
+        Function to simplify a binary operator applied to two already simplified subtrees,
+    """
+
+    (left_tokens, left_value), (right_tokens, right_value) = left, right
+
+    if left_value is not None and right_value is not None:
+        folded = fold(symbol, [left_value, right_value])
+
+        if folded is not None:
+            return folded
+
+    if symbol == '+':
+        if left_value == 0:
+            return right
+
+        if right_value == 0:
+            return left
+
+    elif symbol == '-':
+        if right_value == 0:
+            return left
+
+        if left_tokens == right_tokens:
+            return constant(0)
+
+    elif symbol == '*':
+        if left_value == 0 or right_value == 0:
+            return constant(0)
+
+        if left_value == 1:
+            return right
+
+        if right_value == 1:
+            return left
+
+    elif symbol == '/':
+        if right_value == 1:
+            return left
+
+        if left_tokens == right_tokens:
+            return constant(1)
+
+    elif symbol == '^':
+        if right_value == 0:
+            return constant(1)
+
+        if right_value == 1:
+            return left
+
+    return [symbol] + left_tokens + right_tokens, None
+
+
+def simplify_gen(gen: List[str], terminal_set: list) -> List[str]:
+    """
+        Function to simplify a genotype, folds constant subtrees, applies algebraic identities
+        (x - x, x / x, x + 0, x * 1, x * 0, x ^ 1, x ^ 0, abs(abs(x)), ln(e(x))) and removes no-ops,
+        * Like the compiled programs, the reversed genotype is walked with a stack of subtrees.
+        * Identities assume the subtree they drop is defined, so x * 0 is 0 even where x is not.
+
+        Parameters:
+            gen (list): Genotype in prefix order
+            terminal_set (list): Set of terminals of the genotype
+
+        Returns:
+            The simplified genotype, never longer than the given one
+    """
+
+    stack = []
+
+    for symbol in reversed(gen):
+        if symbol in terminal_set:
+            stack.append(([symbol], None))
+
+        elif symbol not in OPERATORS:
+            stack.append(([symbol], float(symbol)))
+
+        elif OPERATORS[symbol][0] == 1:
+            stack[-1] = simplify_unary(symbol, stack[-1])
+
+        else:
+            left = stack.pop()
+            stack[-1] = simplify_binary(symbol, left, stack[-1])
+
+    return stack[0][0]
+
+
+def simplify(chromosome: Chromosome) -> bool:
+    """
+        Function to simplify a chromosome in place, its fitness is kept as it is,
+
+        Parameters:
+            chromosome (Chromosome): The chromosome to simplify
+
+        Returns:
+            Whether the genotype changed
+    """
+
+    gen = simplify_gen(chromosome.gen, chromosome.terminal_set)
+
+    if gen == chromosome.gen:
+        return False
+
+    chromosome.gen = gen
+    chromosome.invalidate()
+
+    return True
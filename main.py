@@ -1,8 +1,11 @@
+import os
 import time
+import shutil
 import math
-import matplotlib.pyplot as plt
+from typing import Callable
 from genetic_algorithm.algorithm import *
 from genetic_algorithm.population import *
+from genetic_algorithm.dataset import read_text_points, write_text_points, generate_dataset, dataset_cache_path
 
 
 class Main:
@@ -17,9 +20,6 @@ class Main:
 
         start_time = time.time()
 
-        # it's 1D function
-        terminal_set = ['x0']
-
         # tree
         max_depth = 20
         default_depth = 6
@@ -42,14 +42,16 @@ class Main:
             x_end_range = +10
             x_steps = 0.03
 
-            # create x and y
-            X = self.create_all_points_x(x_start_range, x_end_range, x_steps)
-            Y = self.create_all_points_y(X)
+            # create x and y (cached on disk after the first run)
+            X, Y = self.create_all_points(x_start_range, x_end_range, x_steps)
 
         else:
             # read x and y from file
             X, Y = self.read_all_points()
 
+        # one terminal per input column (x0, x1...)
+        terminal_set = make_terminal_set(X.shape[1])
+
         # create population
         population = Population(population_num, selected_chromosomes, functions, terminal_set, default_depth, max_depth)
 
@@ -60,7 +62,7 @@ class Main:
         best_function, found_functions = algorithm.train()
 
         # predict y in best function
-        y_pred = [[best_function.evaluate_arg(x)] for x in X]
+        y_pred = best_function.predict(X)
 
         # show results of function and fitness in terminal
         self.show_results(start_time, best_function, found_functions)
@@ -68,6 +70,22 @@ class Main:
         # make a plot and show two functions
         self.plot_show(X, Y, y_pred)
 
+    def target(self) -> Callable:
+        """
+            Method to choose the function F,
+
+            Returns:
+                The case function used as F
+        """
+
+        # return self.case1_f
+        # return self.case2_f
+        # return self.case3_f
+        # return self.case4_1_f
+        # return self.case4_2_f
+        # return self.case4_3_f
+        return self.case4_4_f
+
     def f(self, x: float) -> float:
         """
             F function,
@@ -79,13 +97,7 @@ class Main:
                 The result of the function F
         """
 
-        # return self.case1_f(x)
-        # return self.case2_f(x)
-        # return self.case3_f(x)
-        # return self.case4_1_f(x)
-        # return self.case4_2_f(x)
-        # return self.case4_3_f(x)
-        return self.case4_4_f(x)
+        return self.target()(x)
 
     @staticmethod
     def case1_f(x):
@@ -126,12 +138,11 @@ class Main:
 
     @staticmethod
     def case4_4_f(x):
-        return math.tanh(x) + 1
+        return np.tanh(x) + 1
 
-    @staticmethod
-    def create_all_points_x(x_start_range: int, x_end_range: int, x_steps: float) -> list:
+    def create_all_points(self, x_start_range: int, x_end_range: int, x_steps: float) -> Tuple[np.ndarray, np.ndarray]:
         """
-            Method to create x of points,
+            Method to create x and y of points, reusing the dataset cached by an earlier run if there is one,
 
             Parameters:
                 x_start_range (int): Start range of x
@@ -139,52 +150,40 @@ class Main:
                 x_steps (float): Steps of forwarding from start of x to the end
 
             Returns:
-                The list of points
+                The arrays of points (x, y)
         """
 
-        return [[x] for x in np.arange(x_start_range, x_end_range, x_steps)]
+        X, Y = generate_dataset(self.target(), x_start_range, x_end_range, x_steps)
 
-    def create_all_points_y(self, x_list: list) -> list:
-        """
-            Method to create y of points,
+        # the points are formatted once, next to the cached dataset, and points.txt is a copy of them,
+        # so it always holds the points of this run without formatting every point again
+        text = dataset_cache_path(self.target(), x_start_range, x_end_range, x_steps)[:-len(".npy")] + ".txt"
 
-            Parameters:
-                x_list (list): The list of points to find y
-
-            Returns:
-                y_list: The list of points
-        """
-
-        y_list = [[self.f(x[0])] for x in x_list]
-
-        # make tuple of points x, y
-        keeper = [f"({x[0]}, {y_list[x_list.index(x[0])][0]})" for x in x_list]
+        if not os.path.exists(text):
+            temporary = f"{text}.{os.getpid()}.tmp"
+            write_text_points(temporary, X, Y)
+            os.replace(temporary, text)
 
         # save to file
-        with open("points.txt", "w") as file:
-            file.write("\n".join(keeper))
+        shutil.copyfile(text, "points.txt")
 
-        return y_list
+        return X, Y
 
     @staticmethod
-    def read_all_points() -> Tuple[list, list]:
+    def read_all_points(path: str = "points.txt") -> Tuple[np.ndarray, np.ndarray]:
         """
             Method to read points from file,
 
+            Parameters:
+                path (str): Path of the points file
+
             Returns:
-                The list of points
+                The arrays of points (x, y)
         """
 
-        # read the file
-        with open("points.txt", "r") as file:
-            lines = [i.replace(")", "").replace("(", "").split(", ") for i in file.readlines()]
-
-        X, Y = [], []
-        for line in lines:
-            X.append([round(float(line[0]), 5)])
-            Y.append([round(float(line[1]), 5)])
+        X, Y = read_text_points(path)
 
-        return X, Y
+        return np.round(X, 5), np.round(Y, 5)
 
     @staticmethod
     def show_results(start_time: float, best_function: Chromosome, found_functions: list) -> None:
@@ -210,6 +209,9 @@ class Main:
 
         print("< Best Tree Function >\n\n", best_function.gen)
 
+        if best_function.scaling is not None:
+            print("\n< Scaled Best Tree Function >\n\n", best_function)
+
         print("\n----------------------\n")
 
         print(f"< Running Time >")
@@ -226,6 +228,9 @@ class Main:
                 predicted_y_list (list): The list of all predicted points (y`)
         """
 
+        # imported here, so the module can be used without a display or matplotlib
+        import matplotlib.pyplot as plt
+
         # create the function with function
         plt.plot(x_list, y_list,
                  color='b', linestyle='dashed', label='Expected')